@@ -55,6 +55,14 @@ class Settings(BaseSettings):
     # =========================
     # Avoid shipping real keys by default; require env to override
     RPC_URL: str = "https://mainnet.helius-rpc.com/?api-key=REPLACE_ME"
+    # Extra RPC endpoints raced with RPC_URL when sending payout txs (JSON list in env)
+    RPC_URLS: List[str] = []
+    # Attempts per payout RPC call on 429/5xx/timeouts (backoff honours Retry-After)
+    RPC_RETRY_ATTEMPTS: int = 6
+    # Process-wide payout RPC throttle: requests/s (0 = off), burst size, max in flight
+    RPC_RPS: float = 40.0
+    RPC_BURST: float = 4.0
+    RPC_MAX_CONCURRENCY: int = 8
     ADMIN_TOKEN: Optional[str] = None
 
     # =========================
@@ -73,6 +81,21 @@ class Settings(BaseSettings):
     JACKPOT_VAULT_PK: Optional[str] = None
     WHEEL_VAULT_PK: Optional[str] = None
 
+    # Optional Address Lookup Table (mint, token programs, vaults, vault ATAs) used to
+    # shrink payout txs; create + extend it once off-line and set its address here
+    PAYOUT_ALT: Optional[str] = None
+    # Simulate (preflight) the first payout of each tx shape; later sends skip it
+    PAYOUT_PREFLIGHT: bool = True
+    # Seconds one fetched blockhash is reused across payouts (valid ~60s on-chain)
+    BLOCKHASH_TTL_S: float = 20.0
+    # Prepend a compute-unit price (recent p75 fee, capped here in micro-lamports/CU)
+    PAYOUT_PRIORITY_FEE: bool = True
+    PAYOUT_MAX_CU_PRICE: int = 100_000
+    # Coin-flip/wheel payout batching: flush window, and transfers per tx
+    # (unset = 10 with PAYOUT_ALT, else 8, both under the 1232-byte packet limit)
+    PAYOUT_FLUSH_INTERVAL_S: float = 0.25
+    PAYOUT_MAX_BATCH: Optional[int] = None
+
     # =========================
     # Token / Mint
     # =========================
@@ -21,10 +21,12 @@ import aiosqlite
 SCHEMA = """
 PRAGMA journal_mode=WAL;
 
+-- kv / rounds are keyed by TEXT; WITHOUT ROWID stores rows in the PK B-tree
+-- (applies to freshly created DBs; existing tables are left as-is)
 CREATE TABLE IF NOT EXISTS kv (
   k TEXT PRIMARY KEY,
   v TEXT
-);
+) WITHOUT ROWID;
 
 -- Rounds table: TEXT id like 'R0123'
 CREATE TABLE IF NOT EXISTS rounds (
@@ -40,7 +42,7 @@ CREATE TABLE IF NOT EXISTS rounds (
   entropy            TEXT,
   winner             TEXT,
   payout_sig         TEXT
-);
+) WITHOUT ROWID;
 
 CREATE TABLE IF NOT EXISTS bets (
   id TEXT PRIMARY KEY,
@@ -86,13 +88,17 @@ CREATE TABLE IF NOT EXISTS spins(
   settled_at TEXT
 );
 
-CREATE INDEX IF NOT EXISTS idx_rounds_opens_at ON rounds(opens_at);
+-- covering index: recent-rounds listing (ids newest-first; pot is summed from entries)
+DROP INDEX IF EXISTS idx_rounds_opens_at;
+CREATE INDEX IF NOT EXISTS idx_rounds_opens_at_id ON rounds(opens_at DESC, id);
 CREATE INDEX IF NOT EXISTS idx_entries_round   ON entries(round_id);
+CREATE INDEX IF NOT EXISTS idx_entries_round_user ON entries(round_id, user);
 CREATE UNIQUE INDEX IF NOT EXISTS idx_entries_txsig ON entries(tx_sig);
 CREATE INDEX IF NOT EXISTS spins_user_created ON spins(user, created_at);
 
 -- Extra helpful indexes for perf
 CREATE INDEX IF NOT EXISTS idx_bets_created   ON bets(created_at);
+CREATE INDEX IF NOT EXISTS idx_bets_status    ON bets(status);
 CREATE INDEX IF NOT EXISTS idx_spins_created  ON spins(created_at);
 CREATE INDEX IF NOT EXISTS idx_spins_status   ON spins(status);
 
@@ -106,12 +112,24 @@ CREATE TEMP TABLE IF NOT EXISTS _chk_guard (ok INTEGER);
 # =========================================================
 DB_PATH = os.getenv("DB_PATH", "/data/treatz.db")
 
+# sqlite3 keeps a per-connection LRU of prepared statements keyed by SQL text
+# (default 128). Callers pass module-level SQL constants so these hit.
+CACHED_STATEMENTS = 256
+# memory-map the DB file so reads skip read() syscalls and page copies
+MMAP_SIZE = 128 * 1024 * 1024
+
+_schema_applied: set = set()  # db paths connect_sync already ran SCHEMA against
+
+SQL_KV_UPSERT = "INSERT INTO kv(k, v) VALUES(?, ?) ON CONFLICT(k) DO UPDATE SET v=excluded.v"
+SQL_KV_SELECT = "SELECT v FROM kv WHERE k=?"
+SQL_KV_DELETE = "DELETE FROM kv WHERE k=?"
+
 async def connect(db_path: str = DB_PATH) -> aiosqlite.Connection:
     """
     Async connection for FastAPI handlers; ensures schema and sets PRAGMAs.
     """
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
-    conn = await aiosqlite.connect(db_path)
+    conn = await aiosqlite.connect(db_path, cached_statements=CACHED_STATEMENTS)
 
     # Per-connection PRAGMAs to reduce locking and keep WAL fast
     await conn.execute("PRAGMA foreign_keys=ON")
@@ -120,6 +138,7 @@ async def connect(db_path: str = DB_PATH) -> aiosqlite.Connection:
     await conn.execute("PRAGMA temp_store=MEMORY")
     await conn.execute("PRAGMA wal_autocheckpoint=1000")
     await conn.execute("PRAGMA busy_timeout=5000")
+    await conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
 
     # Use aiosqlite.Row for dict-like access
     conn.row_factory = aiosqlite.Row
@@ -140,11 +159,15 @@ async def kv_set(conn: aiosqlite.Connection, k: str, v: str, commit: bool = True
     """
     Upsert a key/value pair in the KV table.
     """
-    await conn.execute(
-        "INSERT INTO kv(k, v) VALUES(?, ?) "
-        "ON CONFLICT(k) DO UPDATE SET v=excluded.v",
-        (k, v),
-    )
+    await conn.execute(SQL_KV_UPSERT, (k, v))
+    if commit:
+        await conn.commit()
+
+async def kv_del(conn: aiosqlite.Connection, k: str, commit: bool = True) -> None:
+    """
+    Remove a key from the KV table (no-op if missing).
+    """
+    await conn.execute(SQL_KV_DELETE, (k,))
     if commit:
         await conn.commit()
 
@@ -152,7 +175,7 @@ async def kv_get(conn: aiosqlite.Connection, k: str) -> Optional[str]:
     """
     Read a value from KV; return None if missing.
     """
-    async with conn.execute("SELECT v FROM kv WHERE k=?", (k,)) as cur:
+    async with conn.execute(SQL_KV_SELECT, (k,)) as cur:
         row = await cur.fetchone()
         return row[0] if row else None
 
@@ -164,7 +187,7 @@ def connect_sync(db_path: str = DB_PATH) -> sqlite3.Connection:
     Synchronous connection for scripts / payout code that prefer blocking I/O.
     """
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
-    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn = sqlite3.connect(db_path, check_same_thread=False, cached_statements=CACHED_STATEMENTS)
     conn.row_factory = sqlite3.Row
 
     # Per-connection PRAGMAs (mirror async)
@@ -174,9 +197,13 @@ def connect_sync(db_path: str = DB_PATH) -> sqlite3.Connection:
     conn.execute("PRAGMA temp_store=MEMORY")
     conn.execute("PRAGMA wal_autocheckpoint=1000")
     conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
 
-    conn.executescript(SCHEMA)
-    conn.commit()
+    # DDL once per process and file; repeat connects skip the schema script
+    if db_path not in _schema_applied:
+        conn.executescript(SCHEMA)
+        conn.commit()
+        _schema_applied.add(db_path)
     return conn
 
 @contextmanager
@@ -199,29 +226,26 @@ def tx(conn: sqlite3.Connection):
 # -------------------------
 # Sync KV helpers (mirror async kv_get / kv_set)
 # -------------------------
-def kv_set_sync(conn: sqlite3.Connection, k: str, v: str) -> None:
+def kv_set_sync(conn: sqlite3.Connection, k: str, v: str, commit: bool = True) -> None:
     """
     Upsert a key/value pair in the KV table (synchronous).
     """
-    conn.execute(
-        "INSERT INTO kv(k, v) VALUES(?, ?) "
-        "ON CONFLICT(k) DO UPDATE SET v=excluded.v",
-        (k, v),
-    )
-    conn.commit()
+    conn.execute(SQL_KV_UPSERT, (k, v))
+    if commit:
+        conn.commit()
 
 def kv_get_sync(conn: sqlite3.Connection, k: str) -> Optional[str]:
     """
     Read a value from KV; return None if missing (synchronous).
     """
-    cur = conn.execute("SELECT v FROM kv WHERE k=?", (k,))
+    cur = conn.execute(SQL_KV_SELECT, (k,))
     row = cur.fetchone()
     return row[0] if row else None
 
 # -------------------------
 # Sequential round id allocator (synchronous)
 # -------------------------
-def alloc_next_round_id_sync(conn: sqlite3.Connection) -> str:
+def alloc_next_round_id_sync(conn: sqlite3.Connection, commit: bool = True) -> str:
     """
     Allocate a sequential round id of the form RNNNN using KV counter 'round:next_id'.
     Returns the new id (e.g. 'R0001').
@@ -233,21 +257,27 @@ def alloc_next_round_id_sync(conn: sqlite3.Connection) -> str:
         n = int(cur or 0) + 1
     except Exception:
         n = 1
-    kv_set_sync(conn, key, str(n))
+    kv_set_sync(conn, key, str(n), commit=commit)
     return f"R{n:04d}"
 
 # -------------------------
 # Create round (synchronous) — uses sequential allocator
 # -------------------------
+SQL_ROUND_INSERT_SYNC = (
+    "INSERT INTO rounds (id, status, opens_at, closes_at, pot, client_seed) VALUES (?, 'OPEN', ?, ?, 0, ?)"
+)
+SQL_ROUND_SETTLE = "UPDATE rounds SET status='SETTLED' WHERE id=?"
+
 def create_round_sync(conn: sqlite3.Connection, opens_at: datetime, closes_at: datetime) -> str:
     """Create a new round row synchronously, returns new round ID (sequential)."""
-    rid = alloc_next_round_id_sync(conn)
-    client_seed = secrets.token_hex(8)
-    conn.execute(
-        "INSERT INTO rounds (id, status, opens_at, closes_at, pot, client_seed) VALUES (?, 'OPEN', ?, ?, 0, ?)",
-        (rid, opens_at.isoformat(), closes_at.isoformat(), client_seed),
-    )
-    conn.commit()
+    # counter bump + insert share one commit (one fsync) and roll back together
+    try:
+        rid = alloc_next_round_id_sync(conn, commit=False)
+        conn.execute(SQL_ROUND_INSERT_SYNC, (rid, opens_at.isoformat(), closes_at.isoformat(), secrets.token_hex(8)))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
     return rid
 
 # -------------------------
@@ -255,7 +285,7 @@ def create_round_sync(conn: sqlite3.Connection, opens_at: datetime, closes_at: d
 # -------------------------
 def mark_round_closed_sync(conn: sqlite3.Connection, round_id: str) -> None:
     """Mark a round SETTLED synchronously."""
-    conn.execute("UPDATE rounds SET status='SETTLED' WHERE id=?", (round_id,))
+    conn.execute(SQL_ROUND_SETTLE, (round_id,))
     conn.commit()
 
 def reset_round_counter_sync(conn: sqlite3.Connection, value: int = 0) -> None:
@@ -10,8 +10,10 @@ import secrets
 import time
 import asyncio
 import traceback
+from contextlib import asynccontextmanager
 import base58 as _b58
 import httpx
+import orjson
 from datetime import datetime, timedelta, timezone
 from typing import Literal, Optional  # <-- move this ABOVE _rfc3339
 def _rfc3339(dt: Optional[datetime]) -> Optional[str]:
@@ -37,7 +39,7 @@ def _rfc3339(dt: Optional[datetime]) -> Optional[str]:
     return iso + "Z"
     
 import os
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, ORJSONResponse
 from fastapi import FastAPI, HTTPException, Request, Query, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
@@ -74,7 +76,9 @@ except Exception as _e:
         )
 
 # NEW: payout helpers (sign + send SPL from vaults)
-from payouts import pay_coinflip_winner, pay_jackpot_winner, pay_jackpot_split
+from payouts import (
+    PayoutNotConfirmed, enqueue_coinflip_payout, pay_jackpot_winner, pay_jackpot_split, close_clients, warm_payouts,
+)
 
 # NEW: RPC helpers for balances/entropy
 from solana.rpc.async_api import AsyncClient
@@ -108,11 +112,10 @@ def admin_guard(creds: HTTPAuthorizationCredentials = Depends(_auth_scheme)):
 # =========================================================
 # App Init
 # =========================================================
-app = FastAPI(title="$TREATZ Backend", version="0.1.0")
+app = FastAPI(title="$TREATZ Backend", version="0.1.0", default_response_class=ORJSONResponse)
 
 # --- normalize paths like //api/webhook/helius -> /api/webhook/helius
 import re
-from fastapi import Request
 
 @app.middleware("http")
 async def _normalize_double_slashes(request: Request, call_next):
@@ -188,15 +191,7 @@ async def list_static():
 # ----------------------------- CORS ---------------------------------
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "https://trickortreatsol.tech",
-        "https://memedev2526.github.io",
-        "https://memedev2526.github.io/-TREATZ",
-        "https://treatz-de1d.onrender.com",
-        "http://localhost:5173",
-        "http://127.0.0.1:8000",
-        "http://localhost:8000",
-    ],
+    allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -208,17 +203,51 @@ API = (getattr(settings, "API_PREFIX", "/api") or "/api").rstrip("/")
 WHEEL_SPIN_PRICE = int(getattr(settings, "WHEEL_SPIN_PRICE", 100_000))  # whole tokens; backend will charge in base units
 TOKEN_DECIMALS = int(getattr(settings, "TOKEN_DECIMALS", 6))
 def _to_base(n: int) -> int: return int(n) * (10 ** TOKEN_DECIMALS)
+
+# =========================================================
+# SQL (hot path)
+# =========================================================
+# Module-level constants: the same str object is passed on every call, so sqlite3's
+# per-connection statement cache (see db.CACHED_STATEMENTS) hits instead of re-preparing.
+SQL_INSERT_BET = (
+    "INSERT INTO bets(id, user, client_seed, server_seed_hash, server_seed_reveal, wager, side, status, created_at) "
+    "VALUES(?,?,?,?,?,?,?,?,?)"
+)
+# batched webhook lookup; {} is filled with a fixed-size "?,?,..." placeholder list
+SQL_SELECT_BETS_IN = "SELECT id, wager, status, client_seed FROM bets WHERE id IN ({})"
+SQL_UPDATE_BET_SETTLE = (
+    "UPDATE bets SET user=?, result=?, win=?, status=?, server_seed_reveal=?, tx_sig=?, settled_at=? WHERE id=?"
+)
+SQL_INSERT_ENTRY = (
+    "INSERT INTO entries(round_id,user,tickets,tx_sig) VALUES(?,?,?,?) "
+    "ON CONFLICT(tx_sig) DO NOTHING"
+)
+SQL_SELECT_ROUND = "SELECT id, status, opens_at, closes_at FROM rounds WHERE id=?"
+SQL_SELECT_ROUNDS_RECENT_POT = (
+    "SELECT r.id, COALESCE((SELECT SUM(e.tickets) FROM entries e WHERE e.round_id = r.id), 0) "
+    "FROM rounds r ORDER BY r.opens_at DESC LIMIT ?"
+)
+SQL_SUM_ROUND_TICKETS = "SELECT COALESCE(SUM(tickets),0) FROM entries WHERE round_id=?"
     
 # =========================================================
 # Crypto Helpers
 # =========================================================
+# Webhook HMAC key, encoded once at import instead of per request
+_HMAC_SECRET_BYTES = (getattr(settings, "HMAC_SECRET", "") or "").encode("utf-8")
+
 def _hash(s: str) -> str:
     return hashlib.sha256(s.encode()).hexdigest()
 
 
+def _hash_seed(rid: str) -> str:
+    """sha256('seed:' + rid) hashed from bytes (no intermediate str concat)."""
+    return hashlib.sha256(b"seed:" + rid.encode("ascii")).hexdigest()
+
+
 def _hmac(secret: str, msg: str, as_hex: bool = False) -> str | bytes:
     """Return HMAC-SHA256 over msg using secret. Hex for storage, raw bytes for RNG."""
-    dig = hmac.new(secret.encode(), msg.encode(), hashlib.sha256).digest()
+    # hmac.digest() is the one-shot C fast path (no HMAC object allocation)
+    dig = hmac.digest(secret.encode(), msg.encode(), "sha256")
     return dig.hex() if as_hex else dig
 
 
@@ -483,34 +512,109 @@ def _parse_iso_z(s: Optional[str]) -> Optional[datetime]:
             # Re-raise so caller sees the error (so it can be logged)
             raise
             
+# ---------- current round id (process cache) ----------
+# /admin/round/close can run on any worker, so even the leader's cache is re-checked
+# against KV this often; a close elsewhere shows up within the TTL, not a round later.
+CURRENT_ROUND_TTL_S = 2.0
+
+def _cache_current_round_id(rid: Optional[str]) -> None:
+    app.state.current_round_id = rid
+    app.state.current_round_id_at = time.monotonic()
+
+async def _current_round_id() -> Optional[str]:
+    """
+    Current round id from process memory. KV 'current_round_id' stays the source of
+    truth across restarts and workers; the cache is filled at startup, swapped on
+    round close and re-read after CURRENT_ROUND_TTL_S.
+    """
+    # Only the scheduler-leader worker swaps rounds on schedule, so only it caches;
+    # other workers (uvicorn --workers N) read KV each time.
+    if not getattr(app.state, "round_leader", True):
+        return await dbmod.kv_get(app.state.db, "current_round_id")
+    rid = getattr(app.state, "current_round_id", None)
+    at = getattr(app.state, "current_round_id_at", 0.0)
+    if rid is None or time.monotonic() - at >= CURRENT_ROUND_TTL_S:
+        rid = await dbmod.kv_get(app.state.db, "current_round_id")
+        _cache_current_round_id(rid)
+    return rid
+
+def _lock_path(name: str) -> str:
+    return os.path.join(os.path.dirname(settings.DB_PATH) or ".", name)
+
+def _acquire_round_leader_lock() -> bool:
+    """
+    Elect one worker (per DB file) to own round lifecycle: non-blocking flock on a file
+    next to the DB. The fd is kept on app.state so the lock lives as long as the worker.
+    Non-POSIX platforms have a single worker, so they are always leader.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return True
+    fd = os.open(_lock_path("treatz.scheduler.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return False
+    app.state.round_leader_fd = fd
+    return True
+
 # ---------- sequential round id helper ----------
+# Serializes the read-bump-write on 'round:next_id' (scheduler and admin endpoints
+# can both open rounds; without this two callers could be handed the same id).
+# The asyncio lock covers this worker; _round_id_flock covers the other workers.
+_round_id_lock = asyncio.Lock()
+ROUND_ID_FLOCK_POLL_S = 0.02
+
+@asynccontextmanager
+async def _round_id_flock():
+    """Exclusive flock next to the DB for the allocation (polled, so cancellable)."""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    fd = os.open(_lock_path("treatz.roundid.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                await asyncio.sleep(ROUND_ID_FLOCK_POLL_S)
+        yield
+    finally:
+        os.close(fd)  # closing the fd releases the lock
+
 async def alloc_next_round_id() -> str:
     """
     Allocate a sequential id 'RNNNN'. Before incrementing, sync the KV counter with DB max
     so we never collide with already-present rows.
     """
-    # 1) bump KV to DB max if behind
-    await sync_round_counter_to_dbmax()
+    async with _round_id_lock, _round_id_flock():
+        # 1) bump KV to DB max if behind
+        await sync_round_counter_to_dbmax()
 
-    # 2) read, bump, write
-    key = "round:next_id"
-    cur = await dbmod.kv_get(app.state.db, key)
-    try:
-        n = int(cur or 0) + 1
-    except Exception:
-        n = 1
-
-    # 3) last-resort safety: if R{n} exists, resync and recompute once
-    cand = f"R{n:04d}"
-    async with app.state.db.execute("SELECT 1 FROM rounds WHERE id=?", (cand,)) as c:
-        row = await c.fetchone()
-    if row:
-        # resync → recompute
-        n = (await sync_round_counter_to_dbmax()) + 1
+        # 2) read, bump, write
+        key = "round:next_id"
+        cur = await dbmod.kv_get(app.state.db, key)
+        try:
+            n = int(cur or 0) + 1
+        except Exception:
+            n = 1
+
+        # 3) last-resort safety: if R{n} exists, resync and recompute once
         cand = f"R{n:04d}"
+        async with app.state.db.execute("SELECT 1 FROM rounds WHERE id=?", (cand,)) as c:
+            row = await c.fetchone()
+        if row:
+            # resync → recompute
+            n = (await sync_round_counter_to_dbmax()) + 1
+            cand = f"R{n:04d}"
 
-    await dbmod.kv_set(app.state.db, key, str(n))
-    return cand
+        await dbmod.kv_set(app.state.db, key, str(n))
+        return cand
 
 # ---------- round counter sync helpers ----------
 async def _db_max_round_num(conn) -> int:
@@ -542,9 +646,7 @@ async def sync_round_counter_to_dbmax() -> int:
 # --- Derived pot helper: always compute from entries ---
 async def _round_pot_base_units(conn, rid: str) -> int:
     """Pot (base units) = SUM(entries.tickets) * TICKET_PRICE"""
-    async with conn.execute(
-        "SELECT COALESCE(SUM(tickets),0) FROM entries WHERE round_id=?", (rid,)
-    ) as cur:
+    async with conn.execute(SQL_SUM_ROUND_TICKETS, (rid,)) as cur:
         row = await cur.fetchone()
     total_tickets = int(row[0] or 0)
     return total_tickets * int(getattr(settings, "TICKET_PRICE", 0))
@@ -552,6 +654,16 @@ async def _round_pot_base_units(conn, rid: str) -> int:
 # =========================================================
 # Lifecycle
 # =========================================================
+# Failed closes / loop errors back off exponentially (with jitter) up to this cap, so a
+# systemic failure (RPC down) doesn't retry settlement every couple of seconds.
+SCHED_BACKOFF_MIN_S = 2.0
+SCHED_BACKOFF_MAX_S = 300.0
+
+
+def _next_backoff(cur: float) -> float:
+    return min(SCHED_BACKOFF_MAX_S, cur * 2) * (0.8 + 0.4 * secrets.randbelow(1000) / 1000)
+
+
 async def round_scheduler():
     """
     Watches current round timing; when it expires, calls admin_close_round()
@@ -560,9 +672,10 @@ async def round_scheduler():
     Instrumented: when an exception occurs we print full traceback + context
     (current_round_id, last SQL row if available) so we can identify the failing SQL.
     """
+    backoff = SCHED_BACKOFF_MIN_S
     while True:
         try:
-            rid = await dbmod.kv_get(app.state.db, "current_round_id")
+            rid = await _current_round_id()
             if not rid:
                 await asyncio.sleep(2)
                 continue
@@ -597,6 +710,10 @@ async def round_scheduler():
                 continue
 
             status = (row[1] or "").upper()
+            if status != "OPEN":
+                # round was swapped elsewhere (e.g. /admin/round/close on another worker):
+                # drop the cached id so the next pass re-reads KV
+                app.state.current_round_id = None
             # use timezone-aware now to match stored ISO datetimes (they should be Z/UTC)
             now = datetime.now(timezone.utc)
 
@@ -609,18 +726,22 @@ async def round_scheduler():
                 try:
                     # call admin_close_round and surface any exception
                     await admin_close_round(auth=True)
+                    backoff = SCHED_BACKOFF_MIN_S
                 except Exception as admin_ex:
-                    print("[round_scheduler] admin_close_round raised an exception for round:", rid, flush=True)
+                    print(f"[round_scheduler] admin_close_round raised an exception for round: {rid} (retry in {backoff:.0f}s)", flush=True)
                     traceback.print_exc()
-                    # small breather
-                    await asyncio.sleep(1.0)
+                    await asyncio.sleep(backoff)
+                    backoff = _next_backoff(backoff)
                 # small breather to avoid tight loop after handling a close
                 await asyncio.sleep(1.0)
             else:
-                # compute sleep seconds safely
+                backoff = SCHED_BACKOFF_MIN_S  # healthy pass
+                # one sleep straight to closes_at instead of waking every few seconds;
+                # a manual close only moves closes_at later, so waking at the old
+                # deadline just re-reads the row and sleeps again
                 try:
                     delta_s = (closes_at - now).total_seconds()
-                    sleep_s = max(1.0, min(5.0, delta_s))
+                    sleep_s = max(1.0, delta_s)
                 except Exception as se:
                     print("[round_scheduler] error computing sleep interval", flush=True)
                     traceback.print_exc()
@@ -629,21 +750,66 @@ async def round_scheduler():
         except Exception as ex:
             # This is a top-level protection: print full traceback and context so you can diagnose.
             try:
-                print("[round_scheduler] top-level exception (will sleep 2s):", str(ex), flush=True)
+                print(f"[round_scheduler] top-level exception (will sleep {backoff:.0f}s):", str(ex), flush=True)
                 print("current_round_id:", repr(rid) if 'rid' in locals() else "<unknown>", flush=True)
                 if 'row' in locals():
                     print("last row:", repr(row), flush=True)
                 traceback.print_exc()
             except Exception:
                 pass
-            await asyncio.sleep(2.0)
+            await asyncio.sleep(backoff)
+            backoff = _next_backoff(backoff)
             
 @app.on_event("startup")
 async def on_startup():
-    # Connect DB + ensure schema
+    # Safety net: never open a second connection / scheduler if startup runs twice
+    if getattr(app.state, "db", None) is not None:
+        return
+
+    # Connect DB + ensure schema (each worker opens its own connection)
     app.state.db = await dbmod.connect(settings.DB_PATH)
     await ensure_schema(app.state.db)
 
+    # Bet insert batcher (see _bet_flusher). It gets its own connection: commit() and
+    # rollback() act on a whole connection, so on the shared one they would commit or
+    # discard other handlers' half-done writes (e.g. the webhook's BEGIN block).
+    app.state.bet_db = await dbmod.connect(settings.DB_PATH)
+    app.state.bet_queue = asyncio.Queue()
+    app.state.bet_flusher_task = asyncio.create_task(_bet_flusher())
+
+    # Warm the /rounds/recent cache
+    try:
+        await _load_recent_cache()
+    except Exception:
+        traceback.print_exc()
+
+    # Resolve token program + blockhash off the request path (every worker can pay out)
+    app.state.payout_warm_task = asyncio.create_task(warm_payouts())
+
+    # With several uvicorn workers only one owns the round lifecycle; the others keep
+    # retrying the lock so one takes over if the leader dies or is recycled
+    app.state.round_leader = _acquire_round_leader_lock()
+    if not app.state.round_leader:
+        print("[round_scheduler] another worker is leader; serving requests only", flush=True)
+        app.state.round_leader_watch_task = asyncio.create_task(_round_leader_watch())
+        return
+    await _start_round_leader()
+
+ROUND_LEADER_RETRY_S = 10.0
+
+async def _round_leader_watch() -> None:
+    while not _acquire_round_leader_lock():
+        await asyncio.sleep(ROUND_LEADER_RETRY_S)
+    print("[round_scheduler] leader lock acquired; taking over rounds", flush=True)
+    app.state.current_round_id = None  # cache was never maintained as a follower
+    app.state.round_leader = True
+    try:
+        await _start_round_leader()
+    except Exception:
+        traceback.print_exc()
+
+async def _start_round_leader() -> None:
+    """Leader-only startup: sync the id counter, ensure an OPEN round, start the scheduler."""
     try:
         await sync_round_counter_to_dbmax()
     except Exception:
@@ -667,6 +833,9 @@ async def on_startup():
         )
         await dbmod.kv_set(app.state.db, "current_round_id", rid)
         await app.state.db.commit()
+        current = rid
+        _recent_cache_invalidate()
+    _cache_current_round_id(current)
 
     # Start internal scheduler loop and keep a reference (helps debugging / graceful shutdown)
     try:
@@ -676,6 +845,29 @@ async def on_startup():
         print("[round_scheduler] failed to start:", e, flush=True)
         traceback.print_exc()
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    # stop the round loop right away instead of letting it finish a sleep/backoff
+    for name in ("round_scheduler_task", "round_leader_watch_task"):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
+    # stop the bet flusher and close its connection
+    task = getattr(app.state, "bet_flusher_task", None)
+    if task is not None:
+        task.cancel()
+    bet_db = getattr(app.state, "bet_db", None)
+    if bet_db is not None:
+        try:
+            await bet_db.close()
+        except Exception:
+            traceback.print_exc()
+    # release the shared payout RPC connection pool
+    try:
+        await close_clients()
+    except Exception:
+        traceback.print_exc()
+
 # =========================================================
 # Health
 # =========================================================
@@ -753,6 +945,59 @@ class EntryResp(BaseModel):
     tx_sig: str
     created_at: str
 
+# =========================================================
+# Bet insert micro-batching (group commit)
+# =========================================================
+BET_FLUSH_MAX_ROWS = 50
+BET_FLUSH_WINDOW_S = 0.010
+
+async def _queue_bet_insert(seed_kv: tuple, bet_row: tuple) -> None:
+    """Enqueue a bet (KV seed + bets row) and wait until its batch is committed."""
+    fut = asyncio.get_running_loop().create_future()
+    await app.state.bet_queue.put((seed_kv, bet_row, fut))
+    await fut
+
+async def _bet_flusher() -> None:
+    """
+    Drain app.state.bet_queue: collect up to BET_FLUSH_MAX_ROWS bets or wait at most
+    BET_FLUSH_WINDOW_S, then write them with two executemany calls and one commit on
+    the flusher's own connection (app.state.bet_db). Each caller's future gets the
+    result (or the exception) of its batch.
+    """
+    q: asyncio.Queue = app.state.bet_queue
+    db = app.state.bet_db
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await q.get()]
+        deadline = loop.time() + BET_FLUSH_WINDOW_S
+        while len(batch) < BET_FLUSH_MAX_ROWS:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(q.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        try:
+            await db.executemany(dbmod.SQL_KV_UPSERT, [b[0] for b in batch])
+            await db.executemany(SQL_INSERT_BET, [b[1] for b in batch])
+            await db.commit()
+        except Exception as e:
+            traceback.print_exc()
+            try:
+                await db.rollback()
+            except Exception:
+                pass
+            for _kv, _row, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            continue
+
+        for _kv, _row, fut in batch:
+            if not fut.done():
+                fut.set_result(None)
+
 # =========================================================
 # Endpoints — Bets
 # =========================================================
@@ -781,13 +1026,12 @@ async def create_bet(body: NewBet):
     # Commit-reveal seed
     server_seed = secrets.token_hex(32)
     server_seed_hash = _hash(server_seed)
-    await dbmod.kv_set(app.state.db, f"bet:{bet_id}:server_seed", server_seed)
-
     client_seed = secrets.token_hex(8)
 
-    await app.state.db.execute(
-                "INSERT INTO bets(id, user, client_seed, server_seed_hash, server_seed_reveal, wager, side, status, created_at) "
-        "VALUES(?,?,?,?,?,?,?,?,?)",
+    # Seed + bet row are written by _bet_flusher in a group commit; we wait for it
+    # so the bet exists before the client can deposit against it.
+    await _queue_bet_insert(
+        (f"bet:{bet_id}:server_seed", server_seed),
         (
             bet_id,
             "",
@@ -800,7 +1044,6 @@ async def create_bet(body: NewBet):
             _rfc3339(datetime.now(timezone.utc)),
         ),
     )
-    await app.state.db.commit()
 
     deposit = settings.GAME_VAULT_ATA or settings.GAME_VAULT  # prefer ATA
     memo = f"BET:{bet_id}:{body.side}"
@@ -853,6 +1096,37 @@ async def rounds_buy_tickets(round_id: str, payload: dict):
 # =========================================================
 # Endpoints — Rounds (current / recent)
 # =========================================================
+# ---------- /rounds/recent cache ----------
+# Newest-first [round_id, pot_base_units] for the last RECENT_CACHE_SIZE rounds.
+# Local writes patch/invalidate it; the TTL bounds staleness from writes handled by
+# other uvicorn workers.
+RECENT_CACHE_SIZE = 100      # rounds_recent caps limit at 100
+RECENT_CACHE_TTL_S = 5.0
+
+async def _load_recent_cache() -> list:
+    async with app.state.db.execute(SQL_SELECT_ROUNDS_RECENT_POT, (RECENT_CACHE_SIZE,)) as cur:
+        rows = await cur.fetchall()
+    cache = [[str(r[0]), int(r[1] or 0) * TICKET_PRICE] for r in rows]
+    # swap in one assignment (readers never see a half-built list)
+    app.state.recent_cache = cache
+    app.state.recent_cache_ts = time.monotonic()
+    return cache
+
+async def _recent_rounds() -> list:
+    cache = getattr(app.state, "recent_cache", None)
+    if cache is None or time.monotonic() - app.state.recent_cache_ts > RECENT_CACHE_TTL_S:
+        cache = await _load_recent_cache()
+    return cache
+
+def _recent_cache_invalidate() -> None:
+    app.state.recent_cache = None
+
+def _recent_cache_add_pot(round_id: str, delta: int) -> None:
+    for item in getattr(app.state, "recent_cache", None) or ():
+        if item[0] == round_id:
+            item[1] += delta
+            return
+
 class RoundCurrentResp(BaseModel):
     round_id: str
     status: str
@@ -865,11 +1139,8 @@ class RoundCurrentResp(BaseModel):
 
 @app.get(f"{API}/rounds/current", response_model=RoundCurrentResp)
 async def rounds_current():
-    rid = await dbmod.kv_get(app.state.db, "current_round_id")
-    async with app.state.db.execute(
-        "SELECT id, status, opens_at, closes_at FROM rounds WHERE id=?",
-        (rid,),
-    ) as cur:
+    rid = await _current_round_id()
+    async with app.state.db.execute(SQL_SELECT_ROUND, (rid,)) as cur:
         row = await cur.fetchone()
     if not row:
         raise HTTPException(404, "No current round")
@@ -900,25 +1171,18 @@ async def rounds_recent(limit: int = 10):
     except Exception:
         n = 10
 
-    # fetch ids then derive pot for each to avoid LIMIT param quirks
+    # served from the in-memory cache (one SQL load per TTL / invalidation)
     try:
-        async with app.state.db.execute(
-            f"SELECT id FROM rounds ORDER BY opens_at DESC LIMIT {n}"
-        ) as cur:
-            rows = await cur.fetchall()
+        cache = await _recent_rounds()
     except Exception as e:
         print("[rounds_recent] DB error:", e, flush=True)
         traceback.print_exc()
         raise HTTPException(500, "Failed to fetch recent rounds")
 
-    result: list[RecentRoundResp] = []
-    for r in rows:
-        rid = str(r[0])
-        pot_base = await _round_pot_base_units(app.state.db, rid)
-        result.append(RecentRoundResp(id=rid, pot=pot_base))
+    result = [RecentRoundResp(id=rid, pot=pot) for rid, pot in cache[:n]]
 
     if not result:
-        rid = await dbmod.kv_get(app.state.db, "current_round_id")
+        rid = await _current_round_id()
         return [RecentRoundResp(id=rid, pot=0)] if rid else []
 
     return result
@@ -1096,7 +1360,7 @@ async def get_round_winner(round_id: str):
 @app.get(f"{API}/config", response_model=ConfigResp)
 async def get_config(include_balances: bool = False):
     # Current round timing (for countdowns)
-    rid = await dbmod.kv_get(app.state.db, "current_round_id")
+    rid = await _current_round_id()
     opens_at = closes_at = None
     o_dt = c_dt = n_dt = None
     if rid:
@@ -1285,7 +1549,7 @@ async def _wheel_settle(app, spin_id: str, payer_wallet: str, client_seed: str,
         blockhash = secrets.token_hex(16)
     salt = blockhash
 
-    digest = hmac.new(server_seed.encode(), f"{client_seed}|{salt}".encode(), hashlib.sha256).digest()
+    digest = _hmac(server_seed, f"{client_seed}|{salt}")
     rnd = int.from_bytes(digest[:8], "big") / 2**64  # [0,1)
 
     dec = int(getattr(settings, "TOKEN_DECIMALS", 6))
@@ -1479,9 +1743,8 @@ def _verify_helius_signature(request: Request, raw_body: bytes) -> bool:
             pass  # fall through to HMAC mode if configured
 
     # B) HMAC mode (hex or base64)
-    hmac_secret = getattr(settings, "HMAC_SECRET", "")
-    if hmac_secret:
-        dig = hmac.new(hmac_secret.encode("utf-8"), raw_body, hashlib.sha256).digest()
+    if _HMAC_SECRET_BYTES:
+        dig = hmac.digest(_HMAC_SECRET_BYTES, raw_body, "sha256")
         hex_sig = dig.hex()
         try:
             import base64
@@ -1505,12 +1768,33 @@ def _verify_helius_signature(request: Request, raw_body: bytes) -> bool:
     return False
 
 
+# Settings-derived comparands, lowercased once at import instead of per event
+TREATZ_MINT_LC       = (settings.TREATZ_MINT or "").lower()
+GAME_VAULT_LC        = (settings.GAME_VAULT or "").lower()
+JACKPOT_VAULT_LC     = (settings.JACKPOT_VAULT or "").lower()
+GAME_VAULT_ATA_LC    = (settings.GAME_VAULT_ATA or "").lower()
+JACKPOT_VAULT_ATA_LC = (settings.JACKPOT_VAULT_ATA or "").lower()
+# Wheel vaults (fall back to game if not set)
+WHEEL_VAULT_LC       = (getattr(settings, "WHEEL_VAULT", "") or settings.GAME_VAULT or "").lower()
+WHEEL_VAULT_ATA_LC   = (getattr(settings, "WHEEL_VAULT_ATA", "") or settings.GAME_VAULT_ATA or "").lower()
+TICKET_PRICE         = int(settings.TICKET_PRICE)
+
+
+# memo prefix (first 3 chars) -> kind; anything else is not one of our deposits
+_MEMO_KINDS = {"WL:": "WL", "BET": "BET", "JP:": "JP"}
+
+
+def _to_matches(dest: str, ata: str, owner: str) -> bool:
+    """dest must already be lowercased; ata/owner are the *_LC globals."""
+    return dest == ata or dest == owner
+
+
 def _parse_token_transfer(ev: dict):
     # Prefer tokenTransfers array (Helius), fallback to root fields
     tts = ev.get("tokenTransfers") or ev.get("transfers") or []
     for tt in tts:
         mint = (tt.get("mint") or tt.get("tokenAddress") or "").lower()
-        if mint == (settings.TREATZ_MINT or "").lower():
+        if mint == TREATZ_MINT_LC:
             return {
                 "amount": int(tt.get("tokenAmount", 0) or tt.get("amount", 0)),
                 "source": tt.get("fromUserAccount") or tt.get("from") or "",
@@ -1524,6 +1808,21 @@ def _parse_token_transfer(ev: dict):
         "mint": (ev.get("mint") or "").lower(),
     }
 
+async def _prefetch_bets(conn, bet_ids) -> dict:
+    """
+    Load every bet referenced by a webhook delivery with one IN query (chunked to stay
+    under SQLite's bound-parameter limit). Returns {bet_id: [wager, status, client_seed]}.
+    """
+    ids = list(bet_ids)
+    out: dict = {}
+    for i in range(0, len(ids), 500):
+        chunk = ids[i:i + 500]
+        sql = SQL_SELECT_BETS_IN.format(",".join("?" * len(chunk)))
+        async with conn.execute(sql, chunk) as cur:
+            for r in await cur.fetchall():
+                out[r[0]] = [r[1], r[2], r[3]]
+    return out
+
 @app.post(f"{API}/webhook/helius")
 async def helius_webhook(request: Request):
     # Optional signature check (disabled unless header name configured)
@@ -1532,15 +1831,39 @@ async def helius_webhook(request: Request):
     if not _verify_helius_signature(request, raw):
         raise HTTPException(401, "Signature verification failed")
 
+    # parse the raw body we already hold (orjson; no second read/decode pass)
     try:
-        payload = await request.json()
-    except Exception:
+        payload = orjson.loads(raw)
+    except orjson.JSONDecodeError:
         raise HTTPException(400, "Invalid JSON")
 
     events = payload if isinstance(payload, list) else [payload]
+    # one settlement timestamp for the whole (possibly batched) delivery
+    now_iso = _rfc3339(datetime.now(timezone.utc))
+
+    # Prefetch all referenced bets up front (one query instead of one per event)
+    bet_ids = set()
+    for ev in events:
+        m = ev.get("memo") or ev.get("description") or ""
+        if m.startswith("BET:"):
+            parts = m.split(":")
+            if len(parts) == 3:
+                bet_ids.add(parts[1])
+    bets_by_id = await _prefetch_bets(app.state.db, bet_ids) if bet_ids else {}
+
+    # Jackpot writes are grouped and flushed once after the loop
+    jp_entries: list = []           # (round_id, user, tickets, tx_sig)
+    pot_delta: dict = {}            # round_id -> base units added this delivery
+    credit_delta: dict = {}         # sender -> leftover base units (raffle credit)
+    # Coin-flip wins are enqueued together so they share payout batches
+    coin_payouts: list = []         # (bet_id, payout future)
 
     for ev in events:
         memo = ev.get("memo") or ev.get("description") or ""
+        # short-circuit unrelated events before any parsing (one dict probe)
+        kind = _MEMO_KINDS.get(memo[:3])
+        if kind is None or (kind == "BET" and memo[3:4] != ":"):
+            continue
         tx_sig = ev.get("signature") or ev.get("txHash") or ""
 
         parsed = _parse_token_transfer(ev)
@@ -1552,28 +1875,15 @@ async def helius_webhook(request: Request):
         # Mint guard: skip if not our token
         if (ev.get("tokenTransfers") or ev.get("transfers")):
             # already filtered by _parse_token_transfer
-            if parsed.get("mint") != (settings.TREATZ_MINT or "").lower():
+            if parsed.get("mint") != TREATZ_MINT_LC:
                 continue
         else:
             ev_mint = (ev.get("mint") or "").lower()
-            if ev_mint and ev_mint != (settings.TREATZ_MINT or "").lower():
+            if ev_mint and ev_mint != TREATZ_MINT_LC:
                 continue
 
-        game_vault_owner    = (settings.GAME_VAULT or "").lower()
-        jackpot_vault_owner = (settings.JACKPOT_VAULT or "").lower()
-        game_vault_ata      = (settings.GAME_VAULT_ATA or "").lower()
-        jackpot_vault_ata   = (settings.JACKPOT_VAULT_ATA or "").lower()
-
-        # Wheel vaults (fall back to game if not set)
-        wheel_vault_owner   = (getattr(settings, "WHEEL_VAULT", "") or settings.GAME_VAULT or "").lower()
-        wheel_vault_ata     = (getattr(settings, "WHEEL_VAULT_ATA", "") or settings.GAME_VAULT_ATA or "").lower()
-
-        def _to_matches(dest: str, ata: str, owner: str) -> bool:
-            d = (dest or "").lower()
-            return d == (ata or "") or d == (owner or "")
-
         # ---------------- Wheel of Fate deposits ----------------
-        if memo.startswith("WL:") and _to_matches(to_addr, wheel_vault_ata, wheel_vault_owner):
+        if kind == "WL" and _to_matches(to_addr, WHEEL_VAULT_ATA_LC, WHEEL_VAULT_LC):
             try:
                 _, spin_id, client_seed_sent = memo.split(":")
             except Exception:
@@ -1626,25 +1936,24 @@ async def helius_webhook(request: Request):
                 # do not raise; keep processing other events
 
         # ---------------- Coin flip deposits ----------------
-        if memo.startswith("BET:") and _to_matches(to_addr, game_vault_ata, game_vault_owner):
+        if kind == "BET" and _to_matches(to_addr, GAME_VAULT_ATA_LC, GAME_VAULT_LC):
             try:
                 _, bet_id, choice = memo.split(":")
             except Exception:
                 continue
 
-            # Fetch wager + status for idempotency
-            async with app.state.db.execute(
-                "SELECT wager, status FROM bets WHERE id=?", (bet_id,)
-            ) as cur:
-                row = await cur.fetchone()
-                if not row:
-                    continue
+            # wager + status for idempotency (prefetched above)
+            row = bets_by_id.get(bet_id)
+            if not row:
+                continue
 
             wager = int(row[0] or 0)
-            prev_status = (row[1] or "").upper()
 
             existing_payout = await dbmod.kv_get(app.state.db, f"bet:{bet_id}:payout_sig")
-            if prev_status == "SETTLED" and existing_payout:
+            # a payout already sent, still in flight or of unknown outcome must not be
+            # sent twice; the prefetched status may predate a concurrent delivery
+            payout_pending = await dbmod.kv_get(app.state.db, f"bet:{bet_id}:payout_pending")
+            if existing_payout or payout_pending:
                 continue
 
             # Short-deposit guard
@@ -1660,63 +1969,93 @@ async def helius_webhook(request: Request):
                 await app.state.db.commit()
                 continue
 
-            async with app.state.db.execute("SELECT client_seed FROM bets WHERE id=?", (bet_id,)) as c2:
-                r2 = await c2.fetchone()
-            client_seed = r2[0] if r2 else ""
+            client_seed = row[2] or ""
 
-            rng = int.from_bytes(_hmac(server_seed, tx_sig + client_seed), "big")
-            result = "TREAT" if (rng % 2) else "TRICK"
+            # parity of the big-endian digest == low bit of its last byte
+            rng_bit = _hmac(server_seed, tx_sig + client_seed)[-1] & 1
+            result = "TREAT" if rng_bit else "TRICK"
             server_seed_reveal = server_seed
 
             win = int(result == choice)
             status = "SETTLED"
+            pay = bool(win and wager > 0 and not existing_payout)
 
             await app.state.db.execute(
-                "UPDATE bets SET user=?, result=?, win=?, status=?, server_seed_reveal=?, tx_sig=?, settled_at=? WHERE id=?",
-                (sender_raw, result, win, status, server_seed_reveal, tx_sig, _rfc3339(datetime.now(timezone.utc)), bet_id),
+                SQL_UPDATE_BET_SETTLE,
+                (sender_raw, result, win, status, server_seed_reveal, tx_sig, now_iso, bet_id),
             )
+            if pay:
+                await dbmod.kv_set(app.state.db, f"bet:{bet_id}:payout_pending", tx_sig, commit=False)
             await app.state.db.commit()
+            # keep the prefetched row current in case this bet repeats in the batch
+            row[1] = status
 
-            if win and wager > 0 and not existing_payout:
-                try:
-                    payout_amount = wager * int(getattr(settings, "WIN_AMOUNT", 2))
-                    payout_sig = await pay_coinflip_winner(sender_raw, payout_amount)
-                    await dbmod.kv_set(app.state.db, f"bet:{bet_id}:payout_sig", payout_sig)
-                    await app.state.db.commit()
-                except Exception as e:
-                    await dbmod.kv_set(app.state.db, f"bet:{bet_id}:payout_error", str(e))
-                    await app.state.db.commit()
+            if pay:
+                payout_amount = wager * int(getattr(settings, "WIN_AMOUNT", 2))
+                coin_payouts.append(
+                    (bet_id, asyncio.ensure_future(enqueue_coinflip_payout(sender_raw, payout_amount)))
+                )
 
         # ---------------- Jackpot entries -------------------
-        if memo.startswith("JP:") and _to_matches(to_addr, jackpot_vault_ata, jackpot_vault_owner) and amt > 0:
+        if kind == "JP" and _to_matches(to_addr, JACKPOT_VAULT_ATA_LC, JACKPOT_VAULT_LC) and amt > 0:
             parts = memo.split(":")
             if len(parts) >= 2 and parts[1]:
                 round_id = parts[1]
             else:
-                round_id = await dbmod.kv_get(app.state.db, "current_round_id")
+                round_id = await _current_round_id()
 
             # full tickets only
-            tickets = amt // settings.TICKET_PRICE
-            remainder = amt - (tickets * settings.TICKET_PRICE)
+            tickets = amt // TICKET_PRICE
+            remainder = amt - (tickets * TICKET_PRICE)
+
+            if tickets > 0:
+                jp_entries.append((round_id, sender_raw, tickets, tx_sig))
+                pot_delta[round_id] = pot_delta.get(round_id, 0) + tickets * TICKET_PRICE
+            if remainder > 0:
+                credit_delta[sender_raw] = credit_delta.get(sender_raw, 0) + remainder
 
+    # Jackpot entries are committed before waiting on coin-flip confirmations (which
+    # can take minutes), so tickets are in before the round can be drawn.
+    try:
+        # ---------------- Jackpot flush (one transaction per delivery) -------------------
+        if jp_entries or credit_delta:
             try:
                 await app.state.db.execute("BEGIN")
-                if tickets > 0:
+                inserted = 0
+                if jp_entries:
                     # idempotent insert; pot is derived, so we do NOT update rounds.pot
-                    await app.state.db.execute(
-                        "INSERT INTO entries(round_id,user,tickets,tx_sig) VALUES(?,?,?,?) "
-                        "ON CONFLICT(tx_sig) DO NOTHING",
-                        (round_id, sender_raw, tickets, tx_sig),
-                    )
-                if remainder > 0:
-                    key = f"raffle_credit:{sender_raw}"
+                    ins = await app.state.db.executemany(SQL_INSERT_ENTRY, jp_entries)
+                    inserted = ins.rowcount
+                for sender, delta in credit_delta.items():
+                    key = f"raffle_credit:{sender}"
                     existing = await dbmod.kv_get(app.state.db, key)
-                    cur = int(existing or 0)
-                    await dbmod.kv_set(app.state.db, key, str(cur + remainder))
+                    await dbmod.kv_set(app.state.db, key, str(int(existing or 0) + delta), commit=False)
                 await app.state.db.commit()
             except Exception:
                 await app.state.db.rollback()
                 raise
+
+            if jp_entries:
+                if inserted == len(jp_entries):
+                    for rid_, delta in pot_delta.items():
+                        _recent_cache_add_pot(rid_, delta)
+                else:
+                    # some tx_sigs were replays; let the cache reload from SQL
+                    _recent_cache_invalidate()
+    finally:
+        # ---------------- Coin-flip payouts (recorded only once confirmed) -------------------
+        if coin_payouts:
+            results = await asyncio.gather(*(f for _b, f in coin_payouts), return_exceptions=True)
+            for (bet_id, _f), res in zip(coin_payouts, results):
+                if isinstance(res, BaseException):
+                    await dbmod.kv_set(app.state.db, f"bet:{bet_id}:payout_error", str(res), commit=False)
+                    if isinstance(res, PayoutNotConfirmed) and res.landed is None:
+                        continue  # may still land: leave it pending for manual reconcile
+                else:
+                    await dbmod.kv_set(app.state.db, f"bet:{bet_id}:payout_sig", res, commit=False)
+                await dbmod.kv_del(app.state.db, f"bet:{bet_id}:payout_pending", commit=False)
+            await app.state.db.commit()
+
     # <-- make sure this return is indented to the same level as 'for ev in events:' (inside the function, outside the loop)
     return {"ok": True}
 
@@ -1726,7 +2065,7 @@ async def helius_webhook(request: Request):
 @app.post(f"{API}/admin/round/close")
 async def admin_close_round(auth: bool = Depends(admin_guard)):
     """Settle current round using commit-reveal + external entropy, split payouts, then open next round and auto-apply credits."""
-    rid = await dbmod.kv_get(app.state.db, "current_round_id")
+    rid = await _current_round_id()
 
     # Load round basics
     async with app.state.db.execute("SELECT opens_at, closes_at, server_seed_hash, server_seed_reveal, finalize_slot FROM rounds WHERE id=?", (rid,)) as cur:
@@ -1836,6 +2175,7 @@ async def admin_close_round(auth: bool = Depends(admin_guard)):
                 winner_addr, win_amt,
                 DEV_WALLET, dev_amt,
                 BURN_ADDRESS, burn_amt,
+                wait_confirmed=False,
             )
             await dbmod.kv_set(app.state.db, f"round:{rid}:winner", winner_addr)
             await dbmod.kv_set(app.state.db, f"round:{rid}:payout_sig", payout_sig)
@@ -1869,6 +2209,7 @@ async def admin_close_round(auth: bool = Depends(admin_guard)):
             )
             await dbmod.kv_set(app.state.db, "current_round_id", new_id)
             await app.state.db.commit()
+            _cache_current_round_id(new_id)
             break  # success
         except Exception as e:
             # UNIQUE constraint → sync & retry once
@@ -1898,6 +2239,7 @@ async def admin_close_round(auth: bool = Depends(admin_guard)):
             await dbmod.kv_set(app.state.db, k, str(rem))
 
     await app.state.db.commit()
+    _recent_cache_invalidate()
 
     return {
         "ok": True,
@@ -1912,6 +2254,7 @@ async def admin_seed_rounds(n: int = 5, auth: bool = Depends(admin_guard)):
     """Backfill recent, SETTLED rounds for UI testing using sequential IDs."""
     now = datetime.now(timezone.utc)
     created = []
+    rows = []
     for i in range(n):
         # allocate a sequential id rather than random to match production
         rid = await alloc_next_round_id()
@@ -1920,13 +2263,16 @@ async def admin_seed_rounds(n: int = 5, auth: bool = Depends(admin_guard)):
         closes_dt = _rfc3339(now - timedelta(minutes=(n - i) * 45 - 30))
         pot = secrets.randbelow(4_000_000_000)  # up to ~4 SOL in lamports
 
-        await app.state.db.execute(
-            "INSERT OR REPLACE INTO rounds(id,status,opens_at,closes_at,server_seed_hash,client_seed,pot) VALUES(?,?,?,?,?,?,?)",
-            (rid, "SETTLED", opens_dt, closes_dt, _hash("seed:" + rid), secrets.token_hex(8), pot),
-        )
+        rows.append((rid, "SETTLED", opens_dt, closes_dt, _hash_seed(rid), secrets.token_hex(8), pot))
         created.append(rid)
 
+    # one statement for the whole batch
+    await app.state.db.executemany(
+        "INSERT INTO rounds(id,status,opens_at,closes_at,server_seed_hash,client_seed,pot) VALUES(?,?,?,?,?,?,?)",
+        rows,
+    )
     await app.state.db.commit()
+    _recent_cache_invalidate()
     return {"ok": True, "created": created}
 
 @app.post(f"{API}/admin/round/sync_counter")
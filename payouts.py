@@ -1,9 +1,39 @@
 # payouts.py
 from __future__ import annotations
-from typing import Tuple, List, Optional, Union
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, List, Optional, Union
 
-import base58 as _b58
+import asyncio
+import random
+import struct
+from collections import OrderedDict
+from functools import lru_cache
 
+# Rust-backed base58 (based58) when installed; big-int decoder otherwise
+try:
+    import based58 as _fast_b58
+
+    def _b58decode(s: str) -> bytes:
+        return _fast_b58.b58decode(s.encode("ascii"))
+except Exception:
+    # Fallback: one big-int accumulate (multiply chain runs in C) instead of the
+    # base58 package's per-byte Python divmod loop.
+    _B58_ALPHABET = b"123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+    _B58_IDX = [-1] * 256
+    for _i, _c in enumerate(_B58_ALPHABET):
+        _B58_IDX[_c] = _i
+
+    def _b58decode(s: str) -> bytes:
+        raw = s.encode("ascii")
+        n = 0
+        for ch in raw:
+            v = _B58_IDX[ch]
+            if v < 0:
+                raise ValueError(f"Invalid base58 character {chr(ch)!r}")
+            n = n * 58 + v
+        pad = len(raw) - len(raw.lstrip(b"1"))  # leading '1's are leading zero bytes
+        return b"\0" * pad + n.to_bytes((n.bit_length() + 7) // 8, "big")
+
+import httpx
 from config import settings
 from solana.rpc.async_api import AsyncClient
 from solana.rpc.commitment import Confirmed
@@ -55,7 +85,10 @@ from spl.token.instructions import (
 # Use idempotent ATA creation when available
 try:
     from spl.token.instructions import create_associated_token_account_idempotent as create_ata_idem
+    _HAS_IDEM_ATA = True
 except Exception:
+    _HAS_IDEM_ATA = False
+
     def create_ata_idem(*, payer, owner, mint, token_program_id=None, **_):
         return create_associated_token_account(
             payer=payer, owner=owner, mint=mint, program_id=token_program_id
@@ -69,6 +102,8 @@ except Exception:
 TOKEN_2022_PROGRAM_ID_STR = "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb"
 
 RPC_URL = settings.RPC_URL
+# one client lives for the whole process, so give slow RPC nodes more room than the 10s default
+RPC_TIMEOUT_S = 30
 
 # =========================================================
 # Helpers & config
@@ -89,100 +124,268 @@ def _require_token_mint() -> None:
 
 def _token_mint() -> PublicKey:
     _require_token_mint()
-    return to_public_key(settings.TREATZ_MINT)
+    return _pk_from_str(settings.TREATZ_MINT)
+
+
+try:
+    from solders.pubkey import Pubkey as _Pubkey
+except Exception:
+    _Pubkey = None
+
+# solders-based PublicKey (solana-py >= 0.30 or our shim): parse in native code directly
+_NATIVE_PK_PARSE = _Pubkey is not None and (PublicKey is _Pubkey or issubclass(PublicKey, _Pubkey))
+
+
+@lru_cache(maxsize=4096)
+def _pk_from_str(addr: str) -> PublicKey:
+    """
+    base58 str -> PublicKey, memoized: vault/mint/dev/burn strings repeat on every payout.
+    PublicKey is immutable, so sharing cached instances is safe. Invalid input (bad
+    base58 or not 32 bytes) raises ValueError from the single parse; failures aren't cached.
+    """
+    if _NATIVE_PK_PARSE:
+        return _Pubkey.from_string(addr)
+    return PublicKey(addr)
+
+
+# Concrete key classes: the solders shim's PublicKey() hands back plain solders Pubkeys.
+_PK_TYPES = tuple({PublicKey, type(TOKEN_PROGRAM_ID)})
 
 
 def to_public_key(addr: Optional[Union[str, PublicKey, bytes, bytearray]]) -> PublicKey:
+    # exact-type checks first: the hot path sees already-built keys and config strings
+    t = type(addr)
+    if t in _PK_TYPES:
+        return addr  # type: ignore[return-value]
+    if t is str:
+        return _pk_from_str(addr)
     if addr is None:
         raise ValueError("Empty public key provided")
-    try:
-        if isinstance(addr, PublicKey):
-            return addr  # type: ignore[arg-type]
-    except Exception:
-        pass
-    if isinstance(addr, (bytes, bytearray)):
+    if t is bytes or t is bytearray:
         return PublicKey(bytes(addr))
+    if isinstance(addr, _PK_TYPES):
+        return addr  # type: ignore[return-value]
     if isinstance(addr, str):
-        try:
-            return PublicKey(addr)
-        except Exception:
-            raw = _b58.b58decode(addr)
-            if len(raw) != 32:
-                raise ValueError(f"Decoded key length != 32 ({len(raw)})")
-            return PublicKey(raw)
+        return _pk_from_str(str(addr))
     return PublicKey(addr)
 
 
+# ---------------- In-flight RPC coalescing ----------------
+_inflight: Dict[Hashable, "asyncio.Future"] = {}
+
+
+async def _coalesce(key: Hashable, coro_factory: Callable[[], Awaitable]):
+    """
+    Concurrent callers asking for the same (method, args) share one in-flight RPC
+    instead of each sending a duplicate. Nothing is cached once it resolves.
+    """
+    fut = _inflight.get(key)
+    if fut is not None:
+        return await asyncio.shield(fut)
+    fut = asyncio.ensure_future(_with_backoff(coro_factory))
+    _inflight[key] = fut
+    try:
+        return await asyncio.shield(fut)
+    finally:
+        if fut.done():
+            _inflight.pop(key, None)
+        else:
+            fut.add_done_callback(lambda _f: _inflight.pop(key, None))
+
+
+# ---------------- RPC retry/backoff ----------------
+# Public endpoints answer bursts with HTTP 429; without a retry one rate-limit reply
+# fails a whole payout. Retries 429/5xx/transport errors, honouring Retry-After.
+RPC_RETRY_ATTEMPTS = max(1, int(settings.RPC_RETRY_ATTEMPTS))
+RPC_RETRY_BASE_S = 0.25
+RPC_RETRY_MAX_S = 10.0
+
+
+def _retry_hint(exc: BaseException) -> Optional[float]:
+    """
+    None if exc isn't worth retrying; otherwise the server's Retry-After in seconds
+    (0.0 when absent). solana-py wraps httpx errors, so the cause chain is walked.
+    """
+    e: Optional[BaseException] = exc
+    while e is not None:
+        resp = getattr(e, "response", None)
+        status = getattr(resp, "status_code", None)
+        if status is not None:
+            if status != 429 and status < 500:
+                return None
+            try:
+                return max(0.0, float(resp.headers.get("retry-after") or 0.0))
+            except (TypeError, ValueError):
+                return 0.0  # HTTP-date form: fall back to exponential
+        if type(e).__name__ in ("ConnectError", "ConnectTimeout", "ReadTimeout", "RemoteProtocolError", "PoolTimeout"):
+            return 0.0
+        e = e.__cause__ or e.__context__
+    return None
+
+
+async def _with_backoff(
+    coro_factory: Callable[[], Awaitable],
+    attempts: int = RPC_RETRY_ATTEMPTS,
+    base: float = RPC_RETRY_BASE_S,
+):
+    """Await coro_factory(), retrying rate-limit/transient failures with jittered exponential backoff."""
+    for n in range(attempts):
+        try:
+            return await coro_factory()
+        except Exception as e:
+            hint = _retry_hint(e)
+            if hint is None or n == attempts - 1:
+                raise
+            delay = hint or base * (2 ** n) * random.uniform(0.5, 1.5)
+            await asyncio.sleep(min(delay, RPC_RETRY_MAX_S))
+
+
+# Owning token program of TREATZ_MINT; a mint never changes owner, so resolve once.
+_TOKEN_PROG_CACHE: Optional[PublicKey] = None
+
+
+def reset_token_program_cache() -> None:
+    """Forget the cached mint owner program and preflight results (e.g. after a config reload)."""
+    global _TOKEN_PROG_CACHE
+    _TOKEN_PROG_CACHE = None
+    _preflight_ok.clear()
+
+
 async def _mint_owner_program_id(client: AsyncClient) -> PublicKey:
     """
     Determine whether the configured mint is classic SPL Token or Token-2022,
-    and return the correct token program id as a PublicKey.
+    and return the correct token program id as a PublicKey (cached after first lookup).
     """
+    if _TOKEN_PROG_CACHE is not None:
+        return _TOKEN_PROG_CACHE
+
     mint_pk = _token_mint()
-    ai = await client.get_account_info(mint_pk, commitment=Confirmed)
+    ai = await _coalesce(
+        ("getAccountInfo", str(mint_pk)),
+        lambda: client.get_account_info(mint_pk, commitment=Confirmed),
+    )
+    return _token_prog_from_account(ai)
+
+
+def _token_prog_from_account(ai) -> PublicKey:
+    """Cache + return the token program owning the mint, from its getAccountInfo response."""
+    global _TOKEN_PROG_CACHE
+    val = _rpc_value(ai)
+    owner = val.get("owner") if isinstance(val, dict) else getattr(val, "owner", None)
 
-    owner = None
-    if hasattr(ai, "value") and ai.value:
-        owner = getattr(ai.value, "owner", None)
-    elif isinstance(ai, dict):
-        owner = (((ai.get("result") or {}).get("value") or {}).get("owner"))
+    if owner is None:
+        # mint not visible (RPC hiccup); don't cache a guess
+        return TOKEN_PROGRAM_ID
 
-    owner_str = str(owner) if owner is not None else ""
-    if owner_str == (str(TOKEN_2022_PROGRAM_ID) if TOKEN_2022_PROGRAM_ID else TOKEN_2022_PROGRAM_ID_STR):
-        return TOKEN_2022_PROGRAM_ID or to_public_key(TOKEN_2022_PROGRAM_ID_STR)
-    return TOKEN_PROGRAM_ID
+    t22 = TOKEN_2022_PROGRAM_ID or to_public_key(TOKEN_2022_PROGRAM_ID_STR)
+    # dict responses carry the owner as base58; typed ones as a Pubkey (compare raw bytes)
+    is_t22 = owner == TOKEN_2022_PROGRAM_ID_STR if isinstance(owner, str) else bytes(owner) == bytes(t22)
+    if is_t22:
+        _TOKEN_PROG_CACHE = t22
+    else:
+        _TOKEN_PROG_CACHE = TOKEN_PROGRAM_ID
+    return _TOKEN_PROG_CACHE
 
 
 def _kp_from_base58(b58: str) -> Keypair:
     if not b58:
         raise ValueError("Empty secret key provided")
-    raw = _b58.b58decode(b58)
-    if len(raw) == 64:
-        try:
-            return Keypair.from_secret_key(raw)
-        except Exception:
-            try:
-                return Keypair.from_seed(raw[:32])
-            except Exception as e:
-                raise ValueError(f"Could not construct Keypair from 64-byte raw key: {e}")
-    if len(raw) == 32:
-        try:
+    raw = _b58decode(b58)
+    n = len(raw)
+    # 64 bytes = seed || pubkey (solana-keygen format), 32 bytes = bare ed25519 seed
+    try:
+        if n == 64:
             return Keypair.from_secret_key(raw)
-        except Exception:
-            try:
-                return Keypair.from_seed(raw)
-            except Exception as e:
-                raise ValueError(f"Could not construct Keypair from 32-byte seed: {e}")
-    raise ValueError(f"Invalid secret key length: {len(raw)} (expected 32 or 64 bytes)")
+        if n == 32:
+            return Keypair.from_seed(raw)
+    except Exception as e:
+        raise ValueError(f"Could not construct Keypair from {n}-byte key: {e}")
+    raise ValueError(f"Invalid secret key length: {n} (expected 32 or 64 bytes)")
+
+
+@lru_cache(maxsize=None)
+def _vault_kp(b58: str) -> Keypair:
+    """Vault signer decoded once per secret (base58 decode + ed25519 keypair build)."""
+    return _kp_from_base58(b58)
+
+
+@lru_cache(maxsize=8192)
+def _ata(owner: PublicKey, mint_pk: PublicKey, token_prog: PublicKey) -> PublicKey:
+    """
+    ATA derivation (find_program_address = SHA-256 bump search), memoized: vaults,
+    dev/burn wallets and repeat winners map to the same account every time.
+    """
+    return get_associated_token_address(owner, mint_pk, token_program_id=token_prog)
+
+
+# transfer_checked template: program id, account metas and decimals are fixed per
+# (vault, recipient); only the 8-byte LE amount changes between payouts.
+try:
+    from solders.instruction import Instruction as _Ix, AccountMeta as _Meta
+except Exception:
+    _Ix = _Meta = None
+
+# spl-token TokenInstruction::TransferChecked = tag 12, u64 LE amount, u8 decimals
+_TC_PACK = struct.Struct("<BQB").pack
+
+
+@lru_cache(maxsize=4096)
+def _transfer_metas(src: PublicKey, mint_pk: PublicKey, dest: PublicKey, owner: PublicKey) -> tuple:
+    return (
+        _Meta(src, is_signer=False, is_writable=True),
+        _Meta(mint_pk, is_signer=False, is_writable=False),
+        _Meta(dest, is_signer=False, is_writable=True),
+        _Meta(owner, is_signer=True, is_writable=False),
+    )
+
+
+def _transfer_ix(token_prog: PublicKey, src: PublicKey, mint_pk: PublicKey,
+                 dest: PublicKey, owner: PublicKey, amount: int):
+    if _Ix is None:
+        return transfer_checked(token_prog, src, mint_pk, dest, owner, amount, TOKEN_DECIMALS, None)
+    data = _TC_PACK(12, amount, TOKEN_DECIMALS)
+    return _Ix(token_prog, data, list(_transfer_metas(src, mint_pk, dest, owner)))
 
 
 def _assert_owner_matches(vault_pub: PublicKey, kp: Keypair, label: str) -> None:
-    if str(vault_pub) != str(kp.public_key):
+    if bytes(vault_pub) != bytes(kp.public_key):
         raise RuntimeError(
             f"{label} signer does not match configured vault public key. "
             f"({str(vault_pub)} != {str(kp.public_key)})"
         )
 
 
+@lru_cache(maxsize=None)
+def _vault_signer(vault_str: str, pk_b58: str, label: str) -> Tuple[Keypair, PublicKey]:
+    """
+    (keypair, vault pubkey) for a configured vault, owner-checked once per process:
+    both sides are constants, so a mismatch can't appear later. Failures aren't cached.
+    """
+    if not pk_b58:
+        raise RuntimeError(f"{label}_PK not set.")
+    kp = _vault_kp(pk_b58)
+    vault_pub = to_public_key(vault_str)
+    _assert_owner_matches(vault_pub, kp, label)
+    return kp, vault_pub
+
+
 # ---------------- ATA ensure ----------------
 async def _ensure_ata_ixs(
     client: AsyncClient,
     owner: PublicKey,
     payer: PublicKey,
+    token_prog: Optional[PublicKey] = None,
 ) -> Tuple[PublicKey, List]:
     """
     Ensure owner's ATA exists (idempotent), respecting Token-2022 when applicable.
+    Pass token_prog if the caller already resolved it.
     """
     mint_pk = _token_mint()
-    token_prog = await _mint_owner_program_id(client)
-    ata = get_associated_token_address(owner, mint_pk, token_program_id=token_prog)
+    if token_prog is None:
+        token_prog = await _mint_owner_program_id(client)
+    ata = _ata(owner, mint_pk, token_prog)
 
-    resp = await client.get_account_info(ata, commitment=Confirmed)
-    exists = False
-    if hasattr(resp, "value"):
-        exists = bool(resp.value)
-    elif isinstance(resp, dict):
-        exists = ((resp.get("result") or {}).get("value") is not None)
+    exists, = await _atas_exist(client, [ata])
 
     ixs: List = []
     if not exists:
@@ -197,29 +400,417 @@ async def _ensure_ata_ixs(
     return ata, ixs
 
 
+# ATAs a confirmed payout has already landed in; they can never disappear while
+# holding funds, so repeat recipients skip both the probe and the create-ATA ix.
+KNOWN_ATAS_MAX = 8192
+_known_atas: "OrderedDict[bytes, None]" = OrderedDict()
+
+
+def _mark_atas_known(atas) -> None:
+    for a in atas:
+        if a is None:
+            continue
+        k = bytes(a)
+        _known_atas[k] = None
+        _known_atas.move_to_end(k)
+    while len(_known_atas) > KNOWN_ATAS_MAX:
+        _known_atas.popitem(last=False)
+
+
+async def _atas_exist(client: AsyncClient, atas: List[PublicKey]) -> List[bool]:
+    """
+    Existence flags for several token accounts. Known ATAs are True without an RPC.
+    With idempotent create-ATA available, unknown ones are reported missing without
+    probing (the create ix is a no-op on chain if the account exists); otherwise they
+    are checked with ONE getMultipleAccounts call (null value = account missing).
+    """
+    flags = [bytes(a) in _known_atas for a in atas]
+    unknown = [atas[i] for i, ok in enumerate(flags) if not ok]
+    if not unknown or _HAS_IDEM_ATA:
+        return flags
+    resp = await _coalesce(
+        ("getMultipleAccounts", tuple(str(a) for a in unknown)),
+        lambda: client.get_multiple_accounts(unknown, commitment=Confirmed),
+    )
+    vals = iter(list(_rpc_value(resp) or []) + [None] * len(unknown))
+    return [ok or bool(next(vals)) for ok in flags]
+
+
 # ---------------- Blockhash + signature helpers ----------------
+def _rpc_value(resp):
+    """`.value` of a solders typed response (the common path), else JSON-RPC result.value."""
+    try:
+        return resp.value
+    except AttributeError:
+        if isinstance(resp, dict):
+            return (resp.get("result") or {}).get("value")
+        return None
+
+
+# Response parsers are picked once from the first response's shape: solana-py >= 0.24
+# returns solders typed responses, older providers plain JSON-RPC dicts.
+def _bh_from_typed(resp) -> Tuple[str, Optional[int]]:
+    v = resp.value
+    return str(v.blockhash), getattr(v, "last_valid_block_height", None)
+
+
+def _bh_from_dict(resp) -> Tuple[str, Optional[int]]:
+    v = resp["result"]["value"]
+    return str(v["blockhash"]), v.get("lastValidBlockHeight")
+
+
+_bh_extract: Optional[Callable] = None
+
+# blockhash -> lastValidBlockHeight, so confirmation can stop once a tx can't land
+_bh_last_valid: Dict[str, int] = {}
+
+
 async def _get_latest_blockhash_str(client: AsyncClient) -> str:
-    lbh = await client.get_latest_blockhash()
-    # object
-    if hasattr(lbh, "value") and getattr(lbh, "value", None) is not None:
-        bh = getattr(lbh.value, "blockhash", None)
-        if bh:
-            return str(bh)
-    # dict
-    if isinstance(lbh, dict):
-        bh = (lbh.get("result") or {}).get("value", {}).get("blockhash")
-        if bh:
-            return str(bh)
-    raise RuntimeError("Could not fetch latest blockhash")
+    return _blockhash_from_resp(await _with_backoff(client.get_latest_blockhash))
+
+
+def _blockhash_from_resp(lbh) -> str:
+    """Blockhash from a getLatestBlockhash response; records its lastValidBlockHeight."""
+    global _bh_extract
+    if _bh_extract is None:
+        _bh_extract = _bh_from_dict if isinstance(lbh, dict) else _bh_from_typed
+    try:
+        bh, last_valid = _bh_extract(lbh)
+    except Exception as e:
+        raise RuntimeError("Could not fetch latest blockhash") from e
+    if not bh or bh == "None":
+        raise RuntimeError("Could not fetch latest blockhash")
+    if last_valid is not None:
+        if len(_bh_last_valid) >= 64:
+            _bh_last_valid.clear()
+        _bh_last_valid[bh] = int(last_valid)
+    return bh
+
+
+# A blockhash stays valid for ~150 slots (~60s); reusing one for up to 20s saves an
+# RPC round-trip per payout and still leaves ~40s to land (confirm waits <= 30s).
+BLOCKHASH_TTL_S = float(settings.BLOCKHASH_TTL_S)
+
+_bh_cache: Tuple[Optional[str], float] = (None, 0.0)
+_bh_lock = asyncio.Lock()
+# blockhash -> serialized txs already sent under it; a hash's entries are dropped
+# once the cache moves to a different one
+_bh_sent: Dict[str, set] = {}
+
+# Background refresh keeps the cache well inside its TTL, so payouts never wait on
+# getLatestBlockhash; the TTL check above it stays as the fallback if it stalls.
+BLOCKHASH_REFRESH_S = 10.0
+_bh_refresher: Optional[asyncio.Task] = None
+
+
+async def _blockhash_refresher(client: AsyncClient) -> None:
+    while True:
+        await asyncio.sleep(BLOCKHASH_REFRESH_S)
+        try:
+            await _cached_blockhash(client, force=True)
+        except Exception:
+            pass  # transient RPC error: payouts fall back to a live fetch past the TTL
+
+
+def _prime_blockhash(bh: str) -> None:
+    """Seed the cache with a blockhash fetched elsewhere (e.g. a batched warm-up)."""
+    global _bh_cache
+    old = _bh_cache[0]
+    _bh_cache = (bh, asyncio.get_running_loop().time())
+    if old and old != bh:
+        _bh_sent.pop(old, None)
+
+
+async def _cached_blockhash(client: AsyncClient, force: bool = False) -> str:
+    global _bh_cache, _bh_refresher
+    loop = asyncio.get_running_loop()
+    if _bh_refresher is None or _bh_refresher.done():
+        _bh_refresher = asyncio.create_task(_blockhash_refresher(client))
+    bh, at = _bh_cache
+    if not force and bh and loop.time() - at < BLOCKHASH_TTL_S:
+        return bh
+    async with _bh_lock:
+        bh, at = _bh_cache
+        if not force and bh and loop.time() - at < BLOCKHASH_TTL_S:
+            return bh
+        old = _bh_cache[0]
+        bh = await _get_latest_blockhash_str(client)
+        _bh_cache = (bh, loop.time())
+        if old and old != bh:
+            _bh_sent.pop(old, None)
+        return bh
+
+
+# solders message compiler + signer (one Rust call) instead of solana-py's legacy
+# Transaction, which rebuilds Python-level instruction/meta lists on every sign.
+try:
+    from solders.hash import Hash as _Hash
+    from solders.message import MessageV0 as _MessageV0
+    from solders.transaction import VersionedTransaction as _VersionedTx
+except Exception:
+    _MessageV0 = None
+
+
+def _solders_signer(kp: Keypair):
+    inner = getattr(kp, "_kp", None)  # our shim wraps a solders Keypair
+    if inner is not None:
+        return inner
+    to_solders = getattr(kp, "to_solders", None)
+    return to_solders() if to_solders else kp
+
+
+# Address Lookup Table: accounts every payout references (mint, token programs,
+# vaults, vault ATAs) become 1-byte indexes instead of 32-byte keys in the v0 message.
+PAYOUT_ALT_STR = settings.PAYOUT_ALT or ""
+_alt_accounts: Optional[List] = None
+
+
+async def _lookup_tables(client: AsyncClient) -> List:
+    """The configured ALT as [AddressLookupTableAccount], fetched once ([] if unset)."""
+    global _alt_accounts
+    if _alt_accounts is not None:
+        return _alt_accounts
+    if not PAYOUT_ALT_STR or _MessageV0 is None:
+        _alt_accounts = []
+        return _alt_accounts
+    try:
+        key = to_public_key(PAYOUT_ALT_STR)
+        resp = await _coalesce(
+            ("getAccountInfo", PAYOUT_ALT_STR),
+            lambda: client.get_account_info(key, commitment=Confirmed),
+        )
+        return _lookup_tables_from_account(resp)
+    except Exception:
+        return []  # table missing / RPC hiccup: send without it, retry next payout
+
+
+def _lookup_tables_from_account(resp) -> List:
+    """Cache + return [AddressLookupTableAccount] from the ALT's getAccountInfo response."""
+    global _alt_accounts
+    from solders.address_lookup_table_account import AddressLookupTable, AddressLookupTableAccount
+    table = AddressLookupTable.deserialize(bytes(_rpc_value(resp).data))
+    _alt_accounts = [AddressLookupTableAccount(to_public_key(PAYOUT_ALT_STR), list(table.addresses))]
+    return _alt_accounts
+
+
+def _compile_signed(kp: Keypair, payer: PublicKey, ixs: List, blockhash: str, alts: List = ()) -> bytes:
+    if _MessageV0 is not None:
+        msg = _MessageV0.try_compile(payer, ixs, list(alts), _Hash.from_string(blockhash))
+        return bytes(_VersionedTx(msg, [_solders_signer(kp)]))
+    tx = Transaction()
+    for ix in ixs:
+        tx = tx.add(ix)
+    tx.recent_blockhash = blockhash
+    tx.fee_payer = payer
+    tx.sign(kp)
+    return tx.serialize()
+
+
+def _invalidate_blockhash() -> None:
+    global _bh_cache
+    _bh_cache = (None, 0.0)
+    _bh_sent.clear()
+
+
+DUP_RESIGN_TRIES = 5
+DUP_RESIGN_WAIT_S = 0.4  # ~one slot, for the cluster to produce a new blockhash
+
+
+def _is_blockhash_not_found(exc: BaseException) -> bool:
+    msg = f"{exc!r} {exc}".lower()
+    return "blockhashnotfound" in msg or "blockhash not found" in msg
+
+
+async def _sign_serialize(client: AsyncClient, kp: Keypair, payer: PublicKey, ixs: List) -> Tuple[bytes, str]:
+    """
+    Compile ixs against a cached blockhash, sign and serialize; returns (raw, blockhash).
+    Two identical payouts (same recipients + amounts) under the same blockhash would
+    share a signature and the second would be dropped as a duplicate, so those wait
+    for a different blockhash (a refetch inside the same slot can return the same one).
+    """
+    alts = await _lookup_tables(client)
+    bh = await _cached_blockhash(client)
+    raw = _compile_signed(kp, payer, ixs, bh, alts)
+    tries = 0
+    while raw in _bh_sent.get(bh, ()):
+        tries += 1
+        if tries > DUP_RESIGN_TRIES:
+            raise RuntimeError("identical payout already sent under the current blockhash")
+        if tries > 1:
+            await asyncio.sleep(DUP_RESIGN_WAIT_S)
+        bh = await _cached_blockhash(client, force=True)
+        raw = _compile_signed(kp, payer, ixs, bh, alts)
+    _bh_sent.setdefault(bh, set()).add(raw)
+    return raw, bh
+
+
+def _sig_from_typed(resp) -> str:
+    return str(resp.value)
+
+
+def _sig_from_dict(resp) -> str:
+    sig = resp.get("result") or resp.get("signature")
+    if isinstance(sig, dict):
+        sig = sig.get("signature") or sig.get("txHash")
+    return str(sig or resp)
+
+
+_sig_extract: Optional[Callable] = None
 
 
 def _normalize_sig(resp) -> str:
-    if isinstance(resp, dict):
-        sig = resp.get("result") or resp.get("signature")
-        if isinstance(sig, dict):
-            sig = sig.get("signature") or sig.get("txHash")
-        return str(sig or resp)
-    return str(getattr(resp, "value", None) or getattr(resp, "result", None) or resp)
+    global _sig_extract
+    if _sig_extract is None:
+        _sig_extract = _sig_from_dict if isinstance(resp, dict) else _sig_from_typed
+    try:
+        return _sig_extract(resp)
+    except Exception:
+        return str(getattr(resp, "value", None) or getattr(resp, "result", None) or resp)
+
+
+# ---------------- Preflight ----------------
+# Every payout of a given (token program, mint) has the same shape, so the RPC-side
+# simulate (preflight) only proves something the first time. After one send passes
+# preflight, later ones skip it and failures surface through confirmation.
+# max_retries lets the RPC node re-broadcast unconfirmed sends on its own.
+SEND_MAX_RETRIES = 3
+_OPTS_PREFLIGHT = TxOpts(skip_preflight=False, preflight_commitment=Confirmed, max_retries=SEND_MAX_RETRIES)
+_OPTS_SKIP_PREFLIGHT = TxOpts(skip_preflight=True, preflight_commitment=Confirmed, max_retries=SEND_MAX_RETRIES)
+_preflight_ok: set = set()
+# PAYOUT_PREFLIGHT=false skips even the first-of-shape simulate
+PAYOUT_PREFLIGHT = bool(settings.PAYOUT_PREFLIGHT)
+
+
+async def _send_payout(raw: bytes, shape: tuple):
+    if not PAYOUT_PREFLIGHT or shape in _preflight_ok:
+        return await _send_raw_hedged(raw, opts=_OPTS_SKIP_PREFLIGHT)
+    resp = await _send_raw_hedged(raw, opts=_OPTS_PREFLIGHT)
+    _preflight_ok.add(shape)
+    return resp
+
+
+# ---------------- Batched confirmation ----------------
+try:
+    from solders.signature import Signature as _Signature
+except Exception:
+    _Signature = None
+
+CONFIRM_TIMEOUT_S = 30.0
+# sigs with a known lastValidBlockHeight are followed until it passes (a definite
+# landed/never-lands verdict); this only caps the wait if block height can't be read
+CONFIRM_MAX_S = 120.0
+CONFIRM_POLL_S = 0.4
+
+
+def _as_signature(sig):
+    if _Signature is not None and isinstance(sig, str):
+        try:
+            return _Signature.from_string(sig)
+        except Exception:
+            return sig
+    return sig
+
+
+def _status_result(st) -> Optional[bool]:
+    """True = confirmed/finalized, False = failed on-chain, None = not there yet."""
+    if st is None:
+        return None
+    if isinstance(st, dict):
+        err, level = st.get("err"), st.get("confirmationStatus")
+    else:
+        err, level = getattr(st, "err", None), getattr(st, "confirmation_status", None)
+    if err:
+        return False
+    level_s = str(level or "").lower()
+    if "confirmed" in level_s or "finalized" in level_s:
+        return True
+    return None
+
+
+MAX_STATUS_BATCH = 256  # getSignatureStatuses limit per call
+BLOCK_HEIGHT_CHECK_S = 10.0  # how often pending sigs are checked against lastValidBlockHeight
+
+
+class _Confirmer:
+    """
+    One background poller for every in-flight payout signature: each tick sends ONE
+    getSignatureStatuses for all pending sigs (instead of a poll loop per payout).
+    submit() resolves True (confirmed), False (failed on-chain, or its blockhash
+    expired unlanded: block height passed last_valid) or None (timed out, outcome
+    unknown).
+    """
+
+    def __init__(self, poll_s: float = CONFIRM_POLL_S, timeout: float = CONFIRM_TIMEOUT_S):
+        self.poll_s = poll_s
+        self.timeout = timeout
+        self._pending: Dict[str, Tuple[asyncio.Future, float, Optional[int]]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(self, client: AsyncClient, sig: str, last_valid: Optional[int] = None) -> Optional[bool]:
+        loop = asyncio.get_running_loop()
+        entry = self._pending.get(sig)
+        if entry is None:
+            wait = self.timeout if last_valid is None else CONFIRM_MAX_S
+            entry = (loop.create_future(), loop.time() + wait, last_valid)
+            self._pending[sig] = entry
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(client))
+        return await asyncio.shield(entry[0])
+
+    def _resolve(self, sig: str, result: Optional[bool]) -> None:
+        fut, _deadline, _last_valid = self._pending.pop(sig)
+        if not fut.done():
+            fut.set_result(result)
+
+    async def _check(self, client: AsyncClient, sigs: List[str], history: bool = False) -> List[Optional[bool]]:
+        out: List[Optional[bool]] = []
+        for i in range(0, len(sigs), MAX_STATUS_BATCH):
+            chunk = sigs[i:i + MAX_STATUS_BATCH]
+            try:
+                resp = await client.get_signature_statuses(
+                    [_as_signature(s) for s in chunk], search_transaction_history=history
+                )
+                vals = list(_rpc_value(resp) or [])
+            except Exception:
+                vals = []  # transient RPC error: retry next tick
+            out.extend(_status_result(vals[j] if j < len(vals) else None) for j in range(len(chunk)))
+        return out
+
+    async def _block_height(self, client: AsyncClient) -> Optional[int]:
+        try:
+            h = _rpc_value(await client.get_block_height(Confirmed))
+            return int(h) if h is not None else None
+        except Exception:
+            return None
+
+    async def _run(self, client: AsyncClient) -> None:
+        loop = asyncio.get_running_loop()
+        next_height_check = loop.time() + BLOCK_HEIGHT_CHECK_S
+        while self._pending:
+            sigs = list(self._pending)
+            for s, res in zip(sigs, await self._check(client, sigs)):
+                if res is not None:
+                    self._resolve(s, res)
+            now = loop.time()
+            expired = [s for s, (_f, deadline, _lv) in self._pending.items() if now >= deadline]
+            if expired:
+                # last look in ledger history: the recent-status cache only spans ~150 slots
+                for s, res in zip(expired, await self._check(client, expired, history=True)):
+                    self._resolve(s, res)
+            if now >= next_height_check and any(lv is not None for _f, _d, lv in self._pending.values()):
+                next_height_check = now + BLOCK_HEIGHT_CHECK_S
+                height = await self._block_height(client)
+                dead = [s for s, (_f, _d, lv) in self._pending.items()
+                        if height is not None and lv is not None and height > lv]
+                if dead:
+                    # blockhash expired: whatever isn't on-chain now never will be
+                    for s, res in zip(dead, await self._check(client, dead, history=True)):
+                        self._resolve(s, False if res is None else res)
+            if self._pending:
+                await asyncio.sleep(self.poll_s)
+
+
+_confirmer = _Confirmer()
 
 
 # ---------------- Core SPL transfer ----------------
@@ -229,110 +820,537 @@ async def _send_spl_from_vault(
     vault_wallet: PublicKey,
     winner_wallet: PublicKey,
     amount_base_units: int,
+    wait_confirmed: bool = True,
 ) -> str:
     if amount_base_units <= 0:
         raise ValueError("amount_base_units must be > 0")
 
     mint_pk = _token_mint()
-    token_prog = await _mint_owner_program_id(client)
 
-    # Ensure recipient ATA (vault pays fees)
-    winner_ata, pre_ixs = await _ensure_ata_ixs(client, winner_wallet, payer=vault_wallet)
+    async def _resolve_recipient():
+        # token program (cached after first call) -> recipient ATA probe (vault pays fees)
+        prog = await _mint_owner_program_id(client)
+        ata, ixs = await _ensure_ata_ixs(client, winner_wallet, payer=vault_wallet, token_prog=prog)
+        return prog, ata, ixs
+
+    # independent RPCs overlap on the wire: ATA probe || blockhash (cache warm-up)
+    (token_prog, winner_ata, pre_ixs), _bh = await asyncio.gather(
+        _resolve_recipient(),
+        _cached_blockhash(client),
+    )
 
     # Vault ATA must be derived with the correct token program as well
-    vault_ata = get_associated_token_address(vault_wallet, mint_pk, token_program_id=token_prog)
+    vault_ata = _ata(vault_wallet, mint_pk, token_prog)
 
-    tx = Transaction()
-    for ix in pre_ixs:
-        tx = tx.add(ix)
+    ixs = list(pre_ixs)
+    ixs.append(_transfer_ix(token_prog, vault_ata, mint_pk, winner_ata, vault_wallet, amount_base_units))
 
-    tx = tx.add(
-        transfer_checked(
-            token_prog,            # program id
-            vault_ata,
-            mint_pk,
-            winner_ata,
-            vault_wallet,
-            amount_base_units,
-            TOKEN_DECIMALS,
-            signers=None,
-        )
+    return await _build_and_send(
+        client, vault_owner_kp, vault_wallet, ixs, (bytes(token_prog), bytes(mint_pk)), [winner_ata],
+        wait_confirmed=wait_confirmed,
     )
 
-    tx.recent_blockhash = await _get_latest_blockhash_str(client)
-    tx.fee_payer = vault_wallet
-
-    # sign & send (with a tiny retry if simulation complains)
-    tx.sign(vault_owner_kp)
-    raw = tx.serialize()
 
+# ---------------- Priority fee ----------------
+try:
+    from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price
+except Exception:
+    set_compute_unit_limit = set_compute_unit_price = None
+
+PAYOUT_PRIORITY_FEE = bool(settings.PAYOUT_PRIORITY_FEE) and set_compute_unit_price is not None
+PAYOUT_MAX_CU_PRICE = int(settings.PAYOUT_MAX_CU_PRICE)
+PRIORITY_FEE_TTL_S = 2.0
+CU_PER_IX = 40_000  # create-ATA is the heaviest ix here (~25-35k CU); transfers ~6k
+MAX_TX_CU = 1_400_000
+PACKET_DATA_SIZE = 1232
+_fee_cache: Tuple[Optional[int], float] = (None, 0.0)
+
+
+def _fee_of(entry) -> int:
+    v = getattr(entry, "prioritization_fee", None)
+    return int(v if v is not None else entry.get("prioritizationFee", 0))
+
+
+async def _priority_fee(client: AsyncClient, accounts: List[PublicKey]) -> int:
+    """p75 of recent prioritization fees touching accounts, capped; cached ~2s."""
+    global _fee_cache
+    price, at = _fee_cache
+    loop = asyncio.get_running_loop()
+    if price is not None and loop.time() - at < PRIORITY_FEE_TTL_S:
+        return price
+    getter = getattr(client, "get_recent_prioritization_fees", None)
+    if getter is None:
+        return 0
     try:
-        resp = await client.send_raw_transaction(
-            raw,
-            opts=TxOpts(skip_preflight=False, preflight_commitment=Confirmed)
-        )
+        resp = await _coalesce(("prio_fee", tuple(bytes(a) for a in accounts)), lambda: getter(accounts))
+        fees = sorted(_fee_of(e) for e in (_rpc_value(resp) or []))
     except Exception:
-        # one retry with skip_preflight=True (network hiccup / compute jitter)
-        resp = await client.send_raw_transaction(
-            raw,
-            opts=TxOpts(skip_preflight=True, preflight_commitment=Confirmed)
-        )
+        return price or 0  # fee lookup is best-effort; never block a payout on it
+    price = min(PAYOUT_MAX_CU_PRICE, fees[(len(fees) - 1) * 3 // 4]) if fees else 0
+    _fee_cache = (price, loop.time())
+    return price
 
-    sig = _normalize_sig(resp)
 
-    # best-effort confirm
+async def _budget_ixs(client: AsyncClient, ixs: List) -> List:
+    """set_compute_unit_limit/price ixs to prepend, or [] when fees are off or zero."""
+    if not PAYOUT_PRIORITY_FEE:
+        return []
     try:
-        await client.confirm_transaction(sig, commitment=Confirmed)
+        accounts = [ixs[-1].accounts[0].pubkey]  # the vault ATA every transfer debits
     except Exception:
+        accounts = []
+    price = await _priority_fee(client, accounts)
+    if price <= 0:
+        return []
+    # price is paid per requested CU, so ask for a bound sized to the tx, not the 200k/ix default
+    return [
+        set_compute_unit_limit(min(MAX_TX_CU, CU_PER_IX * len(ixs))),
+        set_compute_unit_price(price),
+    ]
+
+
+class PayoutNotConfirmed(RuntimeError):
+    """
+    A sent payout didn't confirm. landed=False: it failed on-chain or its blockhash
+    expired unlanded, so it is safe to pay again. landed=None: outcome unknown.
+    """
+
+    def __init__(self, sig: str, landed: Optional[bool]):
+        self.sig = sig
+        self.landed = landed
+        state = "failed or expired" if landed is False else "unconfirmed"
+        super().__init__(f"payout {sig} {state}")
+
+
+async def _build_and_send(
+    client: AsyncClient,
+    kp: Keypair,
+    payer: PublicKey,
+    ixs: List,
+    shape: tuple,
+    atas: List[Optional[PublicKey]],
+    wait_confirmed: bool = True,
+    strict: bool = False,
+) -> str:
+    """
+    Sign against the cached blockhash, send, best-effort confirm; returns the signature.
+    wait_confirmed=False returns right after the send and confirms in the background.
+    strict=True (with wait_confirmed) raises PayoutNotConfirmed unless it confirmed.
+    """
+    budget = await _budget_ixs(client, ixs)
+    if budget:
+        ixs = budget + ixs
+    raw, bh = await _sign_serialize(client, kp, payer, ixs)
+    if budget and len(raw) > PACKET_DATA_SIZE:
+        # a full batch has no room left for the fee ixs: send it at base priority
+        ixs = ixs[len(budget):]
+        raw, bh = await _sign_serialize(client, kp, payer, ixs)
+    # preflight only on the first payout of this shape
+    try:
+        resp = await _send_payout(raw, shape)
+    except Exception as e:
+        if not _is_blockhash_not_found(e):
+            raise
+        # cached hash went stale (e.g. RPC node behind): drop it, re-sign once
+        _invalidate_blockhash()
+        raw, bh = await _sign_serialize(client, kp, payer, ixs)
+        resp = await _send_payout(raw, shape)
+    sig = _normalize_sig(resp)
+    last_valid = _bh_last_valid.get(bh)
+
+    if not wait_confirmed:
+        task = asyncio.create_task(_confirm_and_mark(client, sig, atas, last_valid))
+        _bg_confirms.add(task)
+        task.add_done_callback(_bg_confirms.discard)
         return sig
+    ok = await _confirm_and_mark(client, sig, atas, last_valid)
+    if strict and not ok:
+        raise PayoutNotConfirmed(sig, ok)
     return sig
 
 
-# ---------------- Public payout APIs ----------------
-async def pay_coinflip_winner(winner_pubkey_str: str, amount_base_units: int) -> str:
-    if not GAME_VAULT_PK_B58:
-        raise RuntimeError("GAME_VAULT_PK not set.")
-    kp = _kp_from_base58(GAME_VAULT_PK_B58)
-    vault_pub = to_public_key(GAME_VAULT_STR)
-    _assert_owner_matches(vault_pub, kp, "GAME_VAULT")
-
-    async with AsyncClient(RPC_URL, commitment=Confirmed) as client:
-        return await _send_spl_from_vault(
-            client=client,
-            vault_owner_kp=kp,
-            vault_wallet=vault_pub,
-            winner_wallet=to_public_key(winner_pubkey_str),
-            amount_base_units=amount_base_units,
+_bg_confirms: set = set()  # strong refs so background confirm tasks aren't GC'd
+
+
+async def _confirm_and_mark(
+    client: AsyncClient, sig: str, atas: List[Optional[PublicKey]], last_valid: Optional[int] = None,
+) -> Optional[bool]:
+    # best-effort confirm; a confirmed tx proves the recipient ATAs now exist
+    try:
+        ok = await _confirmer.submit(client, sig, last_valid)
+    except Exception:
+        return None
+    if ok:
+        _mark_atas_known(atas)
+    return ok
+
+
+async def _send_spl_batch_from_vault(
+    client: AsyncClient,
+    vault_owner_kp: Keypair,
+    vault_wallet: PublicKey,
+    transfers: List[Tuple[PublicKey, int]],
+    wait_confirmed: bool = True,
+    strict: bool = False,
+) -> str:
+    """
+    Pay several recipients from one vault in ONE transaction: idempotent create-ATA
+    for recipients not yet known to have one (see _atas_exist), then one
+    transfer_checked per (recipient, amount). One blockhash, signature and confirm.
+    """
+    transfers = [(w, int(a)) for w, a in transfers if int(a) > 0]
+    if not transfers:
+        raise ValueError("no positive transfers")
+
+    mint_pk = _token_mint()
+    token_prog, _bh = await asyncio.gather(
+        _mint_owner_program_id(client),
+        _cached_blockhash(client),
+    )
+
+    atas = [_ata(w, mint_pk, token_prog) for w, _a in transfers]
+    exists = await _atas_exist(client, atas)
+    vault_ata = _ata(vault_wallet, mint_pk, token_prog)
+
+    ixs: List = []
+    seen = set()
+    for (owner, _amt), ata, ok in zip(transfers, atas, exists):
+        key = str(ata)
+        if ok or key in seen:
+            continue
+        seen.add(key)
+        ixs.append(create_ata_idem(payer=vault_wallet, owner=owner, mint=mint_pk, token_program_id=token_prog))
+
+    for (_owner, amt), ata in zip(transfers, atas):
+        ixs.append(_transfer_ix(token_prog, vault_ata, mint_pk, ata, vault_wallet, amt))
+
+    return await _build_and_send(
+        client, vault_owner_kp, vault_wallet, ixs, (bytes(token_prog), bytes(mint_pk)), atas,
+        wait_confirmed=wait_confirmed, strict=strict,
+    )
+
+
+# ---------------- Shared RPC client ----------------
+# One AsyncClient (one httpx connection pool) for all payouts: keep-alive reuses the
+# TCP/TLS session instead of a fresh handshake per payout.
+_client: Optional[AsyncClient] = None
+_client_lock = asyncio.Lock()
+
+
+RPC_MAX_CONNECTIONS = 100
+RPC_MAX_KEEPALIVE = 20
+RPC_KEEPALIVE_EXPIRY_S = 60.0
+RPC_CLIENT_HEADERS = {"solana-client": "treatz/1.0"}
+
+# Process-wide RPC throttle: at most RPC_RPS requests/s (bursts up to RPC_BURST) and
+# RPC_MAX_CONCURRENCY in flight, across every client, so concurrent payouts can't
+# trip the provider's rate limit and set off 429 retry storms. RPC_RPS=0 disables it.
+RPC_RPS = float(settings.RPC_RPS)
+RPC_BURST = float(settings.RPC_BURST)
+RPC_MAX_CONCURRENCY = int(settings.RPC_MAX_CONCURRENCY)
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._at: Optional[float] = None
+
+    async def acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            if self._at is not None:
+                self._tokens = min(self.burst, self._tokens + (now - self._at) * self.rate)
+            self._at = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return
+            await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+
+_rpc_bucket = _TokenBucket(RPC_RPS, RPC_BURST) if RPC_RPS > 0 else None
+_rpc_slots: Optional[asyncio.Semaphore] = None
+
+
+class _ThrottledTransport(httpx.AsyncBaseTransport):
+    """Wraps the pool transport; every HTTP request waits for a slot and a token."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport):
+        self._inner = inner
+
+    async def handle_async_request(self, request):
+        global _rpc_slots
+        if _rpc_slots is None:
+            _rpc_slots = asyncio.Semaphore(max(1, RPC_MAX_CONCURRENCY))
+        async with _rpc_slots:
+            if _rpc_bucket is not None:
+                await _rpc_bucket.acquire()
+            return await self._inner.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+def _solana_py_version() -> Tuple[int, ...]:
+    try:
+        from importlib.metadata import version
+        return tuple(int(x) for x in version("solana").split(".")[:2])
+    except Exception:
+        return ()
+
+
+# AsyncClient takes no session/transport argument, so the pooled, throttled session
+# goes in through the provider's `session` attribute. That is solana-py internals,
+# verified against 0.30.x only; other versions keep the stock session.
+_SESSION_SWAP_OK = _solana_py_version() == (0, 30)
+
+
+async def _new_rpc_client(url: str) -> AsyncClient:
+    """
+    AsyncClient with a pool sized for concurrent payouts and long keep-alive. The
+    provider speaks HTTP/2 when h2 is installed, so concurrent RPCs (gathered
+    lookups, status polls) multiplex over one connection instead of queueing on
+    HTTP/1.1 keep-alive sockets.
+    """
+    client = AsyncClient(url, commitment=Confirmed, timeout=RPC_TIMEOUT_S, extra_headers=RPC_CLIENT_HEADERS)
+    provider = getattr(client, "_provider", None)
+    old = getattr(provider, "session", None)
+    if not _SESSION_SWAP_OK or not isinstance(old, httpx.AsyncClient):
+        return client
+    try:
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+        pool = httpx.AsyncHTTPTransport(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=RPC_MAX_CONNECTIONS,
+                max_keepalive_connections=RPC_MAX_KEEPALIVE,
+                keepalive_expiry=RPC_KEEPALIVE_EXPIRY_S,
+            ),
         )
+        provider.session = httpx.AsyncClient(timeout=old.timeout, transport=_ThrottledTransport(pool))
+    except Exception:
+        return client
+    try:
+        await old.aclose()  # the provider's own (never used) session
+    except Exception:
+        pass
+    return client
+
+
+async def _get_client() -> AsyncClient:
+    global _client
+    if _client is None:
+        async with _client_lock:
+            if _client is None:
+                _client = await _new_rpc_client(RPC_URL)
+    return _client
 
 
-async def pay_jackpot_winner(winner_pubkey_str: str, amount_base_units: int) -> str:
-    if not JACKPOT_VAULT_PK_B58:
-        raise RuntimeError("JACKPOT_VAULT_PK not set.")
-    kp = _kp_from_base58(JACKPOT_VAULT_PK_B58)
-    vault_pub = to_public_key(JACKPOT_VAULT_STR)
-    _assert_owner_matches(vault_pub, kp, "JACKPOT_VAULT")
-
-    async with AsyncClient(RPC_URL, commitment=Confirmed) as client:
-        return await _send_spl_from_vault(
-            client=client,
-            vault_owner_kp=kp,
-            vault_wallet=vault_pub,
-            winner_wallet=to_public_key(winner_pubkey_str),
-            amount_base_units=amount_base_units,
+# JSON-RPC array batching (one POST for independent calls), via the provider's
+# make_batch_request and solders request bodies; used where several lookups are
+# known up front.
+try:
+    from solders.account_decoder import UiAccountEncoding
+    from solders.commitment_config import CommitmentLevel
+    from solders.rpc.config import RpcAccountInfoConfig, RpcContextConfig
+    from solders.rpc.requests import GetAccountInfo, GetLatestBlockhash
+    from solders.rpc.responses import GetAccountInfoResp, GetLatestBlockhashResp
+except Exception:
+    GetAccountInfo = None
+
+
+async def _warm_batched(client: AsyncClient) -> bool:
+    """
+    getAccountInfo(mint) + getLatestBlockhash (+ getAccountInfo(ALT)) as a single
+    JSON-RPC batch, feeding the token program, blockhash and ALT caches. False if the
+    provider can't batch, so the caller falls back to separate calls.
+    """
+    batch = getattr(getattr(client, "_provider", None), "make_batch_request", None)
+    if batch is None or GetAccountInfo is None:
+        return False
+    acct_cfg = RpcAccountInfoConfig(encoding=UiAccountEncoding.Base64, commitment=CommitmentLevel.Confirmed)
+    reqs = [
+        GetAccountInfo(_token_mint(), acct_cfg, id=1),
+        GetLatestBlockhash(RpcContextConfig(commitment=CommitmentLevel.Confirmed), id=2),
+    ]
+    parsers = [GetAccountInfoResp, GetLatestBlockhashResp]
+    with_alt = bool(PAYOUT_ALT_STR) and _MessageV0 is not None and _alt_accounts is None
+    if with_alt:
+        reqs.append(GetAccountInfo(to_public_key(PAYOUT_ALT_STR), acct_cfg, id=3))
+        parsers.append(GetAccountInfoResp)
+    resps = await _with_backoff(lambda: batch(tuple(reqs), tuple(parsers)))
+    _token_prog_from_account(resps[0])
+    _prime_blockhash(_blockhash_from_resp(resps[1]))
+    if with_alt:
+        _lookup_tables_from_account(resps[2])
+    return True
+
+
+async def warm_payouts() -> None:
+    """
+    Resolve the mint's token program, a blockhash and the ALT before the first payout
+    (one batched POST, or concurrent calls if batching isn't available), then prime
+    the vault keypair and vault ATA caches. Best effort; call on app startup.
+    """
+    if not settings.TREATZ_MINT:
+        return
+    client = await _get_client()
+    try:
+        warmed = await _warm_batched(client)
+    except Exception:
+        warmed = False
+    if not warmed:
+        await asyncio.gather(
+            _mint_owner_program_id(client),
+            _cached_blockhash(client),
+            _lookup_tables(client),
+            return_exceptions=True,
         )
+    token_prog = _TOKEN_PROG_CACHE
+    if token_prog is None:
+        return
+    mint_pk = _token_mint()
+    for label, vault_str, pk_b58 in _VAULTS.values():
+        try:
+            if pk_b58:
+                _vault_signer(vault_str, pk_b58, label)
+            if vault_str:
+                _ata(to_public_key(vault_str), mint_pk, token_prog)
+        except Exception:
+            pass  # misconfigured vault: the payout itself reports it
+
+
+async def close_clients() -> None:
+    """Close the shared RPC client(s) (call on app shutdown)."""
+    global _client, _send_clients, _bh_refresher
+    if _bh_refresher is not None:
+        _bh_refresher.cancel()
+        _bh_refresher = None
+    extra, _send_clients = _send_clients[1:], []
+    for c in extra:
+        try:
+            await c.close()
+        except Exception:
+            pass
+    if _client is not None:
+        client, _client = _client, None
+        await client.close()
+
+
+# ---------------- Hedged send ----------------
+# Signed txs are idempotent by signature, so racing the same bytes against several
+# providers is safe; the first accepted signature wins and the stragglers are cancelled.
+SEND_RPC_URLS = [RPC_URL] + [u for u in (settings.RPC_URLS or []) if u and u != RPC_URL]
+HEDGE_STAGGER_S = 0.04
+_send_clients: List[AsyncClient] = []
+
+
+async def _get_send_clients() -> List[AsyncClient]:
+    global _send_clients
+    if not _send_clients:
+        primary = await _get_client()
+        _send_clients = [primary] + [await _new_rpc_client(u) for u in SEND_RPC_URLS[1:]]
+    return _send_clients
+
+
+def _is_already_processed(exc: BaseException) -> bool:
+    msg = f"{exc!r} {exc}".lower()
+    return "alreadyprocessed" in msg or "already been processed" in msg
+
+
+def _raw_signature(raw: bytes) -> Optional[str]:
+    # single-signer wire format: compact-u16 count (1 byte) then the 64-byte fee-payer signature
+    if _Signature is None or len(raw) < 65 or raw[0] != 1:
+        return None
+    return str(_Signature.from_bytes(raw[1:65]))
+
+
+async def _send_one(c: AsyncClient, raw: bytes, opts: TxOpts):
+    try:
+        return await _with_backoff(lambda: c.send_raw_transaction(raw, opts=opts))
+    except Exception as e:
+        # another provider (or an earlier retry) already landed these exact bytes
+        sig = _raw_signature(raw) if _is_already_processed(e) else None
+        if sig is None:
+            raise
+        return sig
+
+
+async def _send_raw_hedged(raw: bytes, opts: TxOpts):
+    """
+    send_raw_transaction to RPC_URL, then to each RPC_URLS entry HEDGE_STAGGER_S apart.
+    Returns the first successful response (or the tx signature if a node reports it
+    already processed); raises the first error if all fail.
+    """
+    clients = await _get_send_clients()
+    if len(clients) == 1:
+        return await _send_one(clients[0], raw, opts)
+
+    async def _launch(i: int, c: AsyncClient):
+        if i:
+            await asyncio.sleep(i * HEDGE_STAGGER_S)
+        return await _send_one(c, raw, opts)
+
+    tasks = [asyncio.create_task(_launch(i, c)) for i, c in enumerate(clients)]
+    first_err: Optional[BaseException] = None
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                err = t.exception()
+                if err is None:
+                    return t.result()
+                first_err = first_err or err
+        raise first_err  # type: ignore[misc]
+    finally:
+        for t in tasks:
+            if not t.done():
+                t.cancel()
+
+
+# ---------------- Public payout APIs ----------------
+async def pay_coinflip_winner(winner_pubkey_str: str, amount_base_units: int, wait_confirmed: bool = True) -> str:
+    kp, vault_pub = _vault_signer(GAME_VAULT_STR, GAME_VAULT_PK_B58, "GAME_VAULT")
+
+    client = await _get_client()
+    return await _send_spl_from_vault(
+        client=client,
+        vault_owner_kp=kp,
+        vault_wallet=vault_pub,
+        winner_wallet=to_public_key(winner_pubkey_str),
+        amount_base_units=amount_base_units,
+        wait_confirmed=wait_confirmed,
+    )
+
+
+async def pay_jackpot_winner(winner_pubkey_str: str, amount_base_units: int, wait_confirmed: bool = True) -> str:
+    kp, vault_pub = _vault_signer(JACKPOT_VAULT_STR, JACKPOT_VAULT_PK_B58, "JACKPOT_VAULT")
+
+    client = await _get_client()
+    return await _send_spl_from_vault(
+        client=client,
+        vault_owner_kp=kp,
+        vault_wallet=vault_pub,
+        winner_wallet=to_public_key(winner_pubkey_str),
+        amount_base_units=amount_base_units,
+        wait_confirmed=wait_confirmed,
+    )
 
 
 async def pay_jackpot_split(
     winner_pubkey_str: str, winner_amount: int,
     dev_pubkey_str: str, dev_amount: int,
     burn_pubkey_str: str, burn_amount: int,
+    wait_confirmed: bool = True,
 ) -> str:
-    if not JACKPOT_VAULT_PK_B58:
-        raise RuntimeError("JACKPOT_VAULT_PK not set.")
-    kp = _kp_from_base58(JACKPOT_VAULT_PK_B58)
-    vault_pub = to_public_key(JACKPOT_VAULT_STR)
-    _assert_owner_matches(vault_pub, kp, "JACKPOT_VAULT")
+    kp, vault_pub = _vault_signer(JACKPOT_VAULT_STR, JACKPOT_VAULT_PK_B58, "JACKPOT_VAULT")
 
     w_pub = to_public_key(winner_pubkey_str) if winner_amount > 0 and winner_pubkey_str else None
     d_pub = to_public_key(dev_pubkey_str) if (dev_amount > 0 and dev_pubkey_str) else None
@@ -340,65 +1358,175 @@ async def pay_jackpot_split(
 
     mint_pk = _token_mint()
 
-    async with AsyncClient(RPC_URL, commitment=Confirmed) as client:
-        tx = Transaction()
+    client = await _get_client()
 
-        pre_ixs: List = []
-        w_ata = d_ata = b_ata = None
-        if w_pub:
-            w_ata, ixs = await _ensure_ata_ixs(client, w_pub, payer=vault_pub); pre_ixs += ixs
-        if d_pub:
-            d_ata, ixs = await _ensure_ata_ixs(client, d_pub, payer=vault_pub); pre_ixs += ixs
-        if b_pub:
-            b_ata, ixs = await _ensure_ata_ixs(client, b_pub, payer=vault_pub); pre_ixs += ixs
+    # resolve the token program once for all three transfers (|| blockhash warm-up)
+    token_prog, _bh = await asyncio.gather(
+        _mint_owner_program_id(client),
+        _cached_blockhash(client),
+    )
 
-        token_prog = await _mint_owner_program_id(client)
-        vault_ata = get_associated_token_address(vault_pub, mint_pk, token_program_id=token_prog)
-
-        for ix in pre_ixs:
-            tx = tx.add(ix)
-
-        if w_pub and winner_amount > 0:
-            tx = tx.add(transfer_checked(
-                token_prog, vault_ata, mint_pk, w_ata, vault_pub,
-                winner_amount, TOKEN_DECIMALS, None
-            ))
-        if d_pub and dev_amount > 0:
-            tx = tx.add(transfer_checked(
-                token_prog, vault_ata, mint_pk, d_ata, vault_pub,
-                dev_amount, TOKEN_DECIMALS, None
-            ))
-        if b_pub and burn_amount > 0:
-            tx = tx.add(transfer_checked(
-                token_prog, vault_ata, mint_pk, b_ata, vault_pub,
-                burn_amount, TOKEN_DECIMALS, None
-            ))
-
-        tx.recent_blockhash = await _get_latest_blockhash_str(client)
-        tx.fee_payer = vault_pub
-
-        tx.sign(kp)
-        raw = tx.serialize()
-        try:
-            sig_resp = await client.send_raw_transaction(
-                raw,
-                opts=TxOpts(skip_preflight=False, preflight_commitment=Confirmed)
-            )
-        except Exception:
-            sig_resp = await client.send_raw_transaction(
-                raw,
-                opts=TxOpts(skip_preflight=True, preflight_commitment=Confirmed)
+    # derive recipient ATAs locally; existence via the known-ATA set (see _atas_exist)
+    w_ata = _ata(w_pub, mint_pk, token_prog) if w_pub else None
+    d_ata = _ata(d_pub, mint_pk, token_prog) if d_pub else None
+    b_ata = _ata(b_pub, mint_pk, token_prog) if b_pub else None
+
+    recipients = [(o, a) for o, a in ((w_pub, w_ata), (d_pub, d_ata), (b_pub, b_ata)) if o]
+    exists = await _atas_exist(client, [a for _o, a in recipients])
+
+    ixs: List = []
+    seen = set()
+    for (owner, ata), ok in zip(recipients, exists):
+        key = str(ata)
+        if ok or key in seen:
+            continue
+        seen.add(key)
+        ixs.append(
+            create_ata_idem(
+                payer=vault_pub,
+                owner=owner,
+                mint=mint_pk,
+                token_program_id=token_prog,
             )
+        )
+
+    vault_ata = _ata(vault_pub, mint_pk, token_prog)
+
+    ixs.extend(
+        _transfer_ix(token_prog, vault_ata, mint_pk, ata, vault_pub, amt)
+        for pub, ata, amt in ((w_pub, w_ata, winner_amount), (d_pub, d_ata, dev_amount), (b_pub, b_ata, burn_amount))
+        if pub and amt > 0
+    )
+
+    return await _build_and_send(
+        client, kp, vault_pub, ixs, (bytes(token_prog), bytes(mint_pk)), [a for _o, a in recipients],
+        wait_confirmed=wait_confirmed,
+    )
+
 
-        sig = _normalize_sig(sig_resp)
+# ---------------- Batched GAME_VAULT payouts ----------------
+# Up to PAYOUT_MAX_BATCH recipients per tx: each new recipient may also need a
+# create-ATA ix, and the whole tx must fit Solana's 1232-byte packet limit. With a
+# PAYOUT_ALT lookup table the shared accounts shrink to 1 byte, so more fit.
+PAYOUT_FLUSH_INTERVAL_S = float(settings.PAYOUT_FLUSH_INTERVAL_S)
+PAYOUT_MAX_BATCH = int(settings.PAYOUT_MAX_BATCH or (10 if PAYOUT_ALT_STR else 8))
 
+
+class PayoutQueue:
+    """
+    Coalesces payouts from one vault that arrive within flush_interval (or until
+    max_batch is reached) into a single multi-transfer transaction. A caller's
+    future resolves with the shared signature only once the tx has confirmed.
+
+    If a batch is rejected outright or definitely didn't land, each payout is retried
+    in its own tx, so one bad recipient fails only its own caller. Transient send
+    errors and unknown outcomes (PayoutNotConfirmed with landed=None) fail the whole
+    batch without a retry: the tx may still land, and a resend could pay twice.
+    """
+
+    def __init__(self, label: str, vault_str: str, vault_pk_b58: str,
+                 flush_interval: float = PAYOUT_FLUSH_INTERVAL_S, max_batch: int = PAYOUT_MAX_BATCH):
+        self.label = label
+        self.vault_str = vault_str
+        self.vault_pk_b58 = vault_pk_b58
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending: List[Tuple[PublicKey, int, asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._sends: set = set()  # strong refs so in-flight batch sends aren't GC'd
+
+    async def enqueue(self, winner_pubkey_str: str, amount_base_units: int) -> str:
+        if amount_base_units <= 0:
+            raise ValueError("amount_base_units must be > 0")
+        if not self.vault_pk_b58:
+            raise RuntimeError(f"{self.label}_PK not set.")
+        winner = to_public_key(winner_pubkey_str)  # validate before joining a batch
+
+        fut = asyncio.get_running_loop().create_future()
+        self._pending.append((winner, amount_base_units, fut))
+        if len(self._pending) >= self.max_batch:
+            batch, self._pending = self._pending, []
+            self._spawn_send(batch)
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+        return await fut
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self._spawn_send(batch)
+
+    def _spawn_send(self, batch: List[Tuple[PublicKey, int, asyncio.Future]]) -> None:
+        task = asyncio.create_task(self._send(batch))
+        self._sends.add(task)
+        task.add_done_callback(self._sends.discard)
+
+    async def _send(self, batch: List[Tuple[PublicKey, int, asyncio.Future]]) -> None:
         try:
-            await client.confirm_transaction(sig, commitment=Confirmed)
-        except Exception:
-            return sig
-        return sig
+            kp, vault_pub = _vault_signer(self.vault_str, self.vault_pk_b58, self.label)
+            client = await _get_client()
+            sig = await _send_spl_batch_from_vault(
+                client, kp, vault_pub, [(w, a) for w, a, _f in batch],
+                wait_confirmed=True, strict=True,
+            )
+        except Exception as e:
+            if len(batch) > 1 and _never_landed(e):
+                await asyncio.gather(*(self._send([entry]) for entry in batch))
+                return
+            for _w, _a, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for _w, _a, fut in batch:
+            if not fut.done():
+                fut.set_result(sig)
+
+
+def _never_landed(exc: BaseException) -> bool:
+    """True when a batch certainly moved no funds, so its payouts can be resent."""
+    if isinstance(exc, PayoutNotConfirmed):
+        return exc.landed is False
+    # non-transient errors are RPC rejections (e.g. preflight) or build failures
+    return _retry_hint(exc) is None
+
+
+_game_payouts = PayoutQueue("GAME_VAULT", GAME_VAULT_STR, GAME_VAULT_PK_B58)
+
+_VAULTS = {
+    "GAME": ("GAME_VAULT", GAME_VAULT_STR, GAME_VAULT_PK_B58),
+    "JACKPOT": ("JACKPOT_VAULT", JACKPOT_VAULT_STR, JACKPOT_VAULT_PK_B58),
+}
+
+
+async def pay_many(vault: str, payouts: List[Tuple[str, int]], wait_confirmed: bool = True) -> List[str]:
+    """
+    Pay several (winner_pubkey_str, amount_base_units) pairs from vault ("GAME" or
+    "JACKPOT"), PAYOUT_MAX_BATCH transfers per transaction. Returns one signature
+    per transaction, in chunk order.
+    """
+    if vault not in _VAULTS:
+        raise ValueError(f"unknown vault {vault!r} (expected one of {sorted(_VAULTS)})")
+    label, vault_str, pk_b58 = _VAULTS[vault]
+    kp, vault_pub = _vault_signer(vault_str, pk_b58, label)
+
+    transfers = [(to_public_key(w), int(a)) for w, a in payouts if int(a) > 0]
+    if not transfers:
+        return []
+    client = await _get_client()
+    chunks = [transfers[i:i + PAYOUT_MAX_BATCH] for i in range(0, len(transfers), PAYOUT_MAX_BATCH)]
+    return list(await asyncio.gather(*(
+        _send_spl_batch_from_vault(client, kp, vault_pub, chunk, wait_confirmed=wait_confirmed)
+        for chunk in chunks
+    )))
+
+
+async def enqueue_coinflip_payout(winner_pubkey_str: str, amount_base_units: int) -> str:
+    """Batched GAME_VAULT payout; resolves with the (shared) tx signature once confirmed."""
+    return await _game_payouts.enqueue(winner_pubkey_str, amount_base_units)
 
 
 async def pay_wheel_winner(winner_pubkey_str: str, amount_base_units: int) -> str:
-    """Pay a Wheel of Fate winner (uses GAME_VAULT under the hood)."""
-    return await pay_coinflip_winner(winner_pubkey_str, amount_base_units)
\ No newline at end of file
+    """Pay a Wheel of Fate winner (uses GAME_VAULT under the hood, batched)."""
+    return await enqueue_coinflip_payout(winner_pubkey_str, amount_base_units)
\ No newline at end of file
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("solana")
+pytest.importorskip("spl.token")
+solders_keypair = pytest.importorskip("solders.keypair")
+
+import payouts  # noqa: E402
+
+
+def _addr() -> str:
+    return str(solders_keypair.Keypair().pubkey())
+
+
+class _Sent(list):
+    outcome = None  # async (transfers) -> sig, set per test
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Record each batch handed to the sender; behaviour is set per test via sent.outcome."""
+    calls = _Sent()
+
+    async def fake_send(client, kp, vault_pub, transfers, wait_confirmed=True, strict=False):
+        calls.append([str(w) for w, _a in transfers])
+        return await calls.outcome(transfers)
+
+    async def fake_client():
+        return None
+
+    monkeypatch.setattr(payouts, "_send_spl_batch_from_vault", fake_send)
+    monkeypatch.setattr(payouts, "_vault_signer", lambda *a: (None, None))
+    monkeypatch.setattr(payouts, "_get_client", fake_client)
+    return calls
+
+
+def _queue() -> payouts.PayoutQueue:
+    return payouts.PayoutQueue("GAME_VAULT", "vault", "secret", flush_interval=0.01, max_batch=10)
+
+
+async def _pay_all(q, winners):
+    return await asyncio.gather(*(q.enqueue(w, 1) for w in winners), return_exceptions=True)
+
+
+def test_batch_shares_one_confirmed_signature(sent):
+    async def ok(transfers):
+        return "SIG"
+
+    sent.outcome = ok
+    winners = [_addr() for _ in range(3)]
+    assert asyncio.run(_pay_all(_queue(), winners)) == ["SIG"] * 3
+    assert sent == [winners]
+
+
+def test_failed_batch_is_retried_per_recipient(sent):
+    bad = _addr()
+
+    async def one_bad(transfers):
+        if len(transfers) > 1:
+            raise payouts.PayoutNotConfirmed("BATCH", False)
+        if str(transfers[0][0]) == bad:
+            raise payouts.PayoutNotConfirmed("SOLO", False)
+        return "SIG-" + str(transfers[0][0])
+
+    sent.outcome = one_bad
+    good = [_addr(), _addr()]
+    res = asyncio.run(_pay_all(_queue(), [good[0], bad, good[1]]))
+    assert res[0] == "SIG-" + good[0] and res[2] == "SIG-" + good[1]
+    assert isinstance(res[1], payouts.PayoutNotConfirmed)
+    assert len(sent) == 4  # the batch, then one tx per recipient
+
+
+def test_unknown_outcome_is_not_resent(sent):
+    async def unknown(transfers):
+        raise payouts.PayoutNotConfirmed("SIG", None)
+
+    sent.outcome = unknown
+    res = asyncio.run(_pay_all(_queue(), [_addr(), _addr()]))
+    assert all(isinstance(r, payouts.PayoutNotConfirmed) and r.landed is None for r in res)
+    assert len(sent) == 1